@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+# Final-answer cache in front of run_conversation. A request is normalized to
+# (topics, resolved location, time bucket), so "AQI in Karachi" and "karachi
+# air quality now" share one entry and a repeat skips both model calls. An
+# answer lives no longer than the data it was built from, and is dropped as
+# soon as any of that data is refetched upstream.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import grid
+from cache_policy import DEFAULT_TTL, data_versions, ttl_for
+from geocoding import cached_city
+from intent import topics
+
+# Degrees a fetched point may lie from the resolved location for the answer to be cached under it
+LOCATION_TOLERANCE = 0.5
+# Words never part of a location name
+STOPWORDS = frozenset("""
+a an the is it in at on of for to by near off from and or what whats what's how will be there
+right now current currently today tomorrow yesterday this next week index level like please
+tell me show give check i we should going do does today's quality data value values
+""".split())
+# Time references the bucket cannot express; requests using them are not cached
+UNBUCKETED = re.compile(r"\b(morning|afternoon|evening|tonight|noon|midnight|hours?|[ap]m|weekend|months?|"
+                        r"days|ago|later|last|since|until)\b", re.IGNORECASE)
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_WORD = re.compile(r"[^\W\d_]+(?:['.-][^\W\d_]+)*")
+_DATE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+_YEAR = re.compile(r"\b(19|20)\d{2}\b")
+
+
+def time_bucket(text: str, today: Optional[date] = None) -> Optional[Tuple]:
+    """
+    The time a request asks about: a date, a set of years, the current week or "now".
+
+    Returns None when the request refers to a time the bucket cannot express.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    lowered = text.lower()
+    dates = _DATE.findall(lowered)
+    rest = _DATE.sub(" ", lowered)
+    years = [match.group(0) for match in _YEAR.finditer(rest)]
+    rest = _YEAR.sub(" ", rest)
+    if UNBUCKETED.search(rest) or re.search(r"\d", rest):
+        return None
+    if dates:
+        return ("dates",) + tuple(sorted(set(dates)))
+    if years:
+        return ("years",) + tuple(sorted(set(years)))
+    if "day after tomorrow" in lowered:
+        return ("dates", (today + timedelta(days=2)).isoformat())
+    for word, days in (("tomorrow", 1), ("yesterday", -1), ("today", 0)):
+        if re.search(rf"\b{word}\b", lowered):
+            return ("dates", (today + timedelta(days=days)).isoformat())
+    for i, weekday in enumerate(_WEEKDAYS):
+        if re.search(rf"\b{weekday}\b", lowered):
+            return ("dates", (today + timedelta(days=(i - today.weekday()) % 7)).isoformat())
+    if re.search(r"\bnext week\b", lowered):
+        return ("week", (today + timedelta(days=7)).isocalendar()[:2])
+    if re.search(r"\bthis week\b", lowered):
+        return ("week", today.isocalendar()[:2])
+    return ("now",)
+
+
+def resolve_location(text: str) -> Optional[Tuple[float, float]]:
+    """
+    Coordinates of the place a request names, from the geocoding cache or gazetteer only.
+
+    Runs of words that are neither stopwords nor intent keywords are tried as
+    city names, longest first. A place never looked up before is not resolved.
+    """
+    runs: List[List[str]] = [[]]
+    for word in _WORD.findall(text):
+        if word.lower() in STOPWORDS or topics(word):
+            runs.append([])
+        else:
+            runs[-1].append(word)
+    candidates = [" ".join(run[i:i + n]) for run in runs for n in range(len(run), 0, -1)
+                  for i in range(len(run) - n + 1)]
+    for candidate in sorted(candidates, key=lambda c: -len(c.split())):
+        record = cached_city(candidate)
+        if record is not None:
+            return round(float(record["latitude"]), 2), round(float(record["longitude"]), 2)
+    return None
+
+
+def answer_key(text: str, today: Optional[date] = None) -> Optional[Tuple]:
+    """(topics, location, time bucket) of a request, or None if it cannot be cached."""
+    found = topics(text or "")
+    if not found:
+        return None
+    bucket = time_bucket(text, today)
+    if bucket is None:
+        return None
+    location = resolve_location(text)
+    if location is None:
+        return None
+    return tuple(sorted(found)), location, bucket
+
+
+class AnswerCache:
+    """
+    Final answers by answer_key, bounded and tied to the data they were built from.
+
+    Args:
+        max_entries (int, optional): Answers kept. Defaults to 512.
+        ttl (int, optional): Lifetime of an answer built without data requests. Defaults to DEFAULT_TTL.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: int = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, answer, snapshot = entry
+                if expires > time.monotonic() and not data_versions.changed(snapshot):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return answer
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, answer: str, requests: Iterable[Tuple[str, dict]] = ()) -> bool:
+        """
+        Stores an answer built from the (url, params) data requests of its turn.
+
+        Nothing is stored when a request was made for a place other than the
+        key's location, i.e. the model resolved the question differently.
+        """
+        requests = list(requests)
+        _, (latitude, longitude), _ = key
+        for url, params in requests:
+            points = grid.snapped_points(url, params)
+            if any(abs(lat - latitude) > LOCATION_TOLERANCE or abs(lon - longitude) > LOCATION_TOLERANCE
+                   for lat, lon in points):
+                return False
+        ttl = min((ttl_for(url, params) for url, params in requests), default=self.ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, answer, data_versions.snapshot(requests))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache(**kwargs) -> AnswerCache:
+    # kwargs apply on first use only
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache(**kwargs)
+    return _cache
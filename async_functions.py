@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+
+# Asyncio counterparts of the fetchers in functions.py. Same names, arguments and
+# return shapes; request building and response parsing are shared with functions.py.
+
+import asyncio
+import json
+import time
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+import functions
+import grid
+from cache_policy import STALE_WHILE_REVALIDATE, data_versions, ttl_for
+from climate_store import aggregate_response, get_climate_store
+from planner import DateOutOfRange
+from timeseries import TimeSeries, block_names, series_cache, series_key
+from functions import _lat_long_output, _city_info_output
+from geocoding import (GEOCODING_URL, cache_key, first_result, geocoding_params, get_geocoding_cache,
+                       offline_fuzzy_lookup, offline_lookup)
+
+
+def _query_params(params):
+    # aiohttp only accepts str values; Open-Meteo takes lists comma separated
+    query = {}
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in value)
+        elif isinstance(value, bool):
+            value = str(value).lower()
+        query[key] = str(value)
+    return query
+
+
+def _decode_flatbuffers(data: bytes):
+    # Same framing as openmeteo_requests: 4-byte little-endian length, then the message
+    messages = []
+    total = len(data)
+    pos = 0
+    while pos < total:
+        length = int.from_bytes(data[pos:pos + 4], byteorder="little")
+        if length == 0x78656E55:  # stream errors start with "Unexpected"
+            raise ValueError(data[pos:total].decode("utf-8"))
+        messages.append(WeatherApiResponse.GetRootAs(data, pos + 4))
+        pos += length + 4
+    return messages
+
+
+class AsyncTTLCache:
+    """
+    In-memory response cache safe to share between tasks on one event loop.
+
+    Concurrent misses for the same key wait on a per-key lock, so only one of
+    them goes upstream and the rest read the stored body. An entry up to
+    stale_while_revalidate seconds past expiry is returned at once while a
+    background task refreshes it.
+    """
+
+    def __init__(self, expire_after: int = 3600, max_entries: int = 1024,
+                 stale_while_revalidate: int = STALE_WHILE_REVALIDATE):
+        self.expire_after = expire_after
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries: Dict[Tuple, Tuple[float, bytes]] = {}
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+        self._refreshing: Dict[Tuple, asyncio.Task] = {}
+
+    def lookup(self, key) -> Tuple[Optional[bytes], bool]:
+        """The stored body, if still servable, and whether it is stale."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        expires, body = entry
+        now = time.monotonic()
+        if expires + self.stale_while_revalidate < now:
+            del self._entries[key]
+            return None, False
+        return body, expires < now
+
+    def get(self, key):
+        body, stale = self.lookup(key)
+        return None if stale else body
+
+    def set(self, key, body, ttl: Optional[int] = None):
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            # Drop the entry closest to expiry
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+        self._entries[key] = (time.monotonic() + (self.expire_after if ttl is None else ttl), body)
+
+    def refresh(self, key, fetch, ttl: Optional[int] = None):
+        """Refetches key on a background task, unless a refresh is already running."""
+        if key in self._refreshing:
+            return
+
+        async def run():
+            try:
+                self.set(key, await fetch(), ttl)
+            except Exception as e:
+                print(f"Background refresh failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.ensure_future(run())
+
+    def lock(self, key) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    async def get_or_fetch(self, key, fetch, ttl: Optional[int] = None):
+        body, stale = self.lookup(key)
+        if body is not None:
+            if stale:
+                self.refresh(key, fetch, ttl)
+            return body
+        lock = self.lock(key)
+        async with lock:
+            body = self.get(key)
+            if body is None:
+                body = await fetch()
+                self.set(key, body, ttl)
+        if not lock.locked():
+            self._locks.pop(key, None)
+        return body
+
+    def clear(self):
+        self._entries.clear()
+
+
+class AsyncOpenMeteoClient:
+    """
+    Asynchronous Open-Meteo client on a pooled aiohttp session.
+
+    Args:
+        expire_after (int, optional): Cache expiration time in seconds for endpoints without a policy. Defaults to 3600.
+        retries (int, optional): Number of retries in case of an error. Defaults to 5.
+        backoff_factor (float, optional): Factor by which the delay between retries will increase. Defaults to 0.2.
+        pool_size (int, optional): Keep-alive connections kept per host. Defaults to 100.
+        timeout (float, optional): Total timeout per request in seconds. Defaults to 30.
+    """
+
+    def __init__(self, expire_after: int = 3600, retries: int = 5, backoff_factor: float = 0.2,
+                 pool_size: int = 100, timeout: float = 30):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache = AsyncTTLCache(expire_after=expire_after)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def _get(self, url, query) -> bytes:
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url, params=query) as response:
+                    if response.status in (500, 502, 504) and attempt < self.retries:
+                        raise aiohttp.ClientResponseError(response.request_info, (), status=response.status)
+                    if response.status in (400, 429):
+                        raise ValueError(await response.text())
+                    response.raise_for_status()
+                    return await response.read()
+            except (aiohttp.ClientConnectionError, aiohttp.ClientResponseError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def _cached_get(self, url, params, force_refresh: bool = False) -> bytes:
+        query = _query_params(params)
+        key = (url, tuple(sorted(query.items())))
+        ttl = ttl_for(url, params, default=self.cache.expire_after)
+        if force_refresh:
+            body = await self._get(url, query)
+            self.cache.set(key, body, ttl)
+            return body
+        return await self.cache.get_or_fetch(key, lambda: self._get(url, query), ttl)
+
+    async def weather_api(self, url: str, params: dict, force_refresh: bool = False):
+        """Get and decode as weather api, like openmeteo_requests.Client.weather_api."""
+        requested = params
+        params, points = grid.canonicalize(url, params)
+        params = dict(params, format="flatbuffers")
+        responses = _decode_flatbuffers(await self._cached_get(url, params, force_refresh))
+        grid.learn(url, points, responses)
+        if force_refresh:
+            data_versions.bump(url, requested)
+        return responses
+
+    async def get_json(self, url: str, params: dict):
+        return json.loads(await self._cached_get(url, params))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_async_client: Optional[AsyncOpenMeteoClient] = None
+
+
+def get_async_openmeteo_client(**kwargs) -> AsyncOpenMeteoClient:
+    # kwargs apply on first use only, like get_openmeteo_client()
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenMeteoClient(**kwargs)
+    return _async_client
+
+
+async def shutdown():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+async def _lookup_city(city_name: str, language: str = 'en'):
+    # Same shared cache as geocoding.lookup_city; its SQLite reads and writes run off the event loop
+    key = cache_key(city_name, language)
+    cache = get_geocoding_cache()
+    record = await asyncio.to_thread(cache.get, key) or offline_lookup(city_name, language)
+    if record is None:
+        try:
+            results = await get_async_openmeteo_client().get_json(GEOCODING_URL, geocoding_params(city_name, language))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            # The API failed (network, timeout or an error response): closest gazetteer spelling, never cached
+            record = await asyncio.to_thread(offline_fuzzy_lookup, city_name, language)
+            if record is None:
+                raise
+            return record
+        record = first_result(results)
+        if record is not None:
+            await asyncio.to_thread(cache.set, key, record)
+    return record
+
+
+async def get_lat_long_from_city(city_name: str, count: int = 1, language: str = 'en', format: str = 'json') -> Optional[Tuple[float, float]]:
+    try:
+        return _lat_long_output(await _lookup_city(city_name, language))
+    except aiohttp.ClientError as e:
+        print(f"Request Exception: {e}")
+        return None
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+
+async def extract_city_info(city_name: str, count: int = 1, language: str = 'en', format: str = 'json'):
+    try:
+        return _city_info_output(await _lookup_city(city_name, language))
+    except KeyError as e:
+        print(f"Error: Key not found in the response - {e}")
+        return None
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+
+async def _refetch_series(openmeteo, url, params, block, key, force_refresh=False):
+    responses = await openmeteo.weather_api(url, params=params, force_refresh=force_refresh)
+    series = TimeSeries.from_response(responses[0], block, block_names(params, block))
+    # set() writes through to the on-disk series store, so it runs off the event loop
+    await asyncio.to_thread(series_cache.set, key, series, ttl_for(url, params))
+    return series
+
+
+_refreshing_series = set()
+
+
+async def _refresh_series(openmeteo, url, params, block, key):
+    try:
+        await _refetch_series(openmeteo, url, params, block, key, force_refresh=True)
+    except Exception as e:
+        print(f"Background refresh failed: {e}")
+    finally:
+        _refreshing_series.discard(key)
+
+
+async def _fetch_series(openmeteo, url, params, block, when, until=None):
+    # Async twin of timeseries.fetch_series, sharing its caches; store reads run off the event loop
+    key = series_key(url, params, block)
+    series, stale = await asyncio.to_thread(series_cache.lookup, key, when)
+    if series is not None and until is not None and not series.covers(until):
+        series = None
+    if series is None:
+        return await _refetch_series(openmeteo, url, params, block, key)
+    if stale and key not in _refreshing_series:
+        _refreshing_series.add(key)
+        asyncio.ensure_future(_refresh_series(openmeteo, url, params, block, key))
+    return series
+
+
+async def _fetch(name, openmeteo, latitude, longitude, *args, block=None, when=None):
+    # Shared body of every async fetcher: build, await, parse with the sync helpers
+    try:
+        url, params = getattr(functions, f"_{name}_request")(latitude, longitude, *args)
+        if block is not None:
+            data = await _fetch_series(openmeteo, url, params, block, when)
+        else:
+            data = await openmeteo.weather_api(url, params=params)
+        return getattr(functions, f"_{name}_output")(data, *args)
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
+    except KeyError as e:
+        print(f"Error: Key not found in the response - {e}")
+        return None
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+
+async def daily_river_discharge(openmeteo, latitude, longitude, target_date):
+    return await _fetch("daily_river_discharge", openmeteo, latitude, longitude, target_date, block="daily", when=target_date)
+
+
+async def air_quality_data(openmeteo, latitude, longitude, target_datetime):
+    return await _fetch("air_quality_data", openmeteo, latitude, longitude, target_datetime, block="hourly", when=target_datetime)
+
+
+async def describe_current_air_quality_index(openmeteo, latitude, longitude, target_datetime):
+    return await _fetch("describe_current_air_quality_index", openmeteo, latitude, longitude, target_datetime)
+
+
+async def daily_marine_data(openmeteo, latitude, longitude, target_datetime):
+    return await _fetch("daily_marine_data", openmeteo, latitude, longitude, target_datetime, block="daily", when=target_datetime)
+
+
+async def hourly_marine_data(openmeteo, latitude, longitude, target_datetime):
+    return await _fetch("hourly_marine_data", openmeteo, latitude, longitude, target_datetime, block="hourly", when=target_datetime)
+
+
+async def _climate_aggregates(openmeteo, latitude, longitude, target_year):
+    # Async twin of climate_store.climate_aggregates, sharing its store; .npz loads and saves run off the event loop
+    url, params = functions._climate_change_data_request(latitude, longitude, target_year)
+    store = get_climate_store()
+    key = store.key(url, params)
+    table = await asyncio.to_thread(store.get, key)
+    if table is None:
+        responses = await openmeteo.weather_api(url, params=params)
+        table = aggregate_response(responses[0])
+        await asyncio.to_thread(store.put, key, table)
+    return table
+
+
+async def climate_change_data(openmeteo, latitude, longitude, target_year=None):
+    try:
+        aggregates = await _climate_aggregates(openmeteo, latitude, longitude, target_year)
+        return functions._climate_change_data_output(aggregates, target_year)
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+
+async def climate_anomaly_data(openmeteo, latitude, longitude, target_year, baseline_start=1961, baseline_end=1990):
+    try:
+        aggregates = await _climate_aggregates(openmeteo, latitude, longitude, target_year)
+        return functions._climate_anomaly_data_output(aggregates, target_year, baseline_start, baseline_end)
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+
+async def describe_current_weather(openmeteo, latitude, longitude):
+    return await _fetch("describe_current_weather", openmeteo, latitude, longitude)
+
+
+async def get_today_weather_data(latitude, longitude, target_date, openmeteo=None, end_date=None):
+    openmeteo = openmeteo or get_async_openmeteo_client()
+    try:
+        url, params = functions._get_today_weather_data_request(latitude, longitude, target_date, end_date)
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
+    series = await _fetch_series(openmeteo, url, params, "daily", target_date, until=end_date)
+    if end_date is not None:
+        return functions._get_today_weather_data_range_output(series, target_date, end_date)
+    return functions._get_today_weather_data_output(series, target_date)
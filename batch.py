@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+# Multi-location variants of the fetchers. Open-Meteo accepts comma-separated
+# latitude/longitude lists and answers with one response per location, so a
+# dashboard refreshing many cities makes a few packed requests instead of one
+# round trip per city.
+
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import functions
+from geocoding import lookup_city
+from planner import DateOutOfRange
+from timeseries import TimeSeries, block_names, series_cache, series_key
+
+# Locations packed into one request; keeps the query string well under URL length limits
+MAX_LOCATIONS_PER_REQUEST = 100
+
+
+def _resolve(location) -> Optional[Tuple[float, float]]:
+    # A (latitude, longitude) pair, or a city name looked up through the geocoding cache
+    if isinstance(location, str):
+        record = lookup_city(location)
+        return (float(record["latitude"]), float(record["longitude"])) if record else None
+    latitude, longitude = location
+    return float(latitude), float(longitude)
+
+
+def _key(location) -> Hashable:
+    return location if isinstance(location, str) else tuple(location)
+
+
+def _chunks(items: List, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _located(locations: Iterable) -> Tuple[Dict[Hashable, None], List[Tuple[Hashable, Tuple[float, float]]]]:
+    # Every input location gets a result slot; repeated locations are fetched once
+    results, points = {}, []
+    for location in locations:
+        key = _key(location)
+        if key in results:
+            continue
+        results[key] = None
+        try:
+            point = _resolve(location)
+        except Exception as e:
+            print(f"Exception: {location}: {e}")
+            continue
+        if point is None:
+            print(f"Error: Unable to retrieve coordinates for {location}.")
+        else:
+            points.append((key, point))
+    return results, points
+
+
+def batch_responses(openmeteo, url: str, params: dict, points: List[Tuple[float, float]],
+                    chunk_size: int = MAX_LOCATIONS_PER_REQUEST) -> List:
+    """
+    One response per point, in order, fetched in packed multi-location requests.
+
+    Args:
+        openmeteo: Open-Meteo client.
+        url (str): Endpoint URL.
+        params (dict): Request params; latitude/longitude are replaced per chunk.
+        points (list): (latitude, longitude) pairs.
+        chunk_size (int, optional): Locations per request. Defaults to MAX_LOCATIONS_PER_REQUEST.
+
+    Returns:
+        list: Responses aligned with points; None for every point of a chunk that failed.
+    """
+    responses = []
+    for chunk in _chunks(points, chunk_size):
+        chunk_params = dict(params)
+        chunk_params["latitude"] = ",".join(str(latitude) for latitude, _ in chunk)
+        chunk_params["longitude"] = ",".join(str(longitude) for _, longitude in chunk)
+        try:
+            chunk_responses = list(openmeteo.weather_api(url, params=chunk_params))
+        except Exception as e:
+            print(f"Exception: {e}")
+            chunk_responses = []
+        if len(chunk_responses) != len(chunk):
+            chunk_responses = [None] * len(chunk)
+        responses.extend(chunk_responses)
+    return responses
+
+
+def _batch_current(openmeteo, locations, request, output, chunk_size) -> Dict:
+    results, points = _located(locations)
+    if not points:
+        return results
+    url, params = request(*points[0][1])
+    responses = batch_responses(openmeteo, url, params, [point for _, point in points], chunk_size)
+    for (key, _), response in zip(points, responses):
+        if response is None:
+            continue
+        try:
+            results[key] = output(response)
+        except Exception as e:
+            print(f"Exception: {key}: {e}")
+    return results
+
+
+def batch_current_weather(openmeteo, locations: Iterable,
+                          chunk_size: int = MAX_LOCATIONS_PER_REQUEST) -> Dict:
+    """
+    Current weather for many locations.
+
+    Args:
+        openmeteo: Open-Meteo client.
+        locations (iterable): (latitude, longitude) pairs or city names.
+        chunk_size (int, optional): Locations per request. Defaults to MAX_LOCATIONS_PER_REQUEST.
+
+    Returns:
+        dict: describe_current_weather output keyed by the input location; None where it failed.
+    """
+    return _batch_current(openmeteo, locations, functions._describe_current_weather_request,
+                          lambda response: functions._describe_current_weather_output([response]), chunk_size)
+
+
+def batch_current_air_quality_index(openmeteo, locations: Iterable,
+                                    chunk_size: int = MAX_LOCATIONS_PER_REQUEST) -> Dict:
+    """
+    Current European and US AQI for many locations.
+
+    Args:
+        openmeteo: Open-Meteo client.
+        locations (iterable): (latitude, longitude) pairs or city names.
+        chunk_size (int, optional): Locations per request. Defaults to MAX_LOCATIONS_PER_REQUEST.
+
+    Returns:
+        dict: describe_current_air_quality_index output keyed by the input location; None where it failed.
+    """
+    return _batch_current(openmeteo, locations,
+                          lambda latitude, longitude: functions._describe_current_air_quality_index_request(latitude, longitude, None),
+                          lambda response: functions._describe_current_air_quality_index_output([response], None), chunk_size)
+
+
+def batch_daily_forecast(openmeteo, locations: Iterable, target_date,
+                         chunk_size: int = MAX_LOCATIONS_PER_REQUEST) -> Dict:
+    """
+    get_today_weather_data for many locations and one date.
+
+    Locations whose series is already cached are answered from memory; the
+    rest are fetched packed, and each decoded series is cached under the same
+    key a single-location call uses.
+
+    Args:
+        openmeteo: Open-Meteo client.
+        locations (iterable): (latitude, longitude) pairs or city names.
+        target_date (str): Date in the format 'YYYY-MM-DD'.
+        chunk_size (int, optional): Locations per request. Defaults to MAX_LOCATIONS_PER_REQUEST.
+
+    Returns:
+        dict: get_today_weather_data output keyed by the input location; None where it failed.
+    """
+    results, points = _located(locations)
+    if not points:
+        return results
+    try:
+        url, params = functions._get_today_weather_data_request(*points[0][1], target_date)
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return results
+
+    series_by_key, missing = {}, []
+    for key, (latitude, longitude) in points:
+        cache_key = series_key(url, dict(params, latitude=latitude, longitude=longitude), "daily")
+        series = series_cache.get(cache_key, target_date)
+        if series is None:
+            missing.append((key, (latitude, longitude), cache_key))
+        else:
+            series_by_key[key] = series
+
+    names = block_names(params, "daily")
+    responses = batch_responses(openmeteo, url, params, [point for _, point, _ in missing], chunk_size)
+    for (key, _, cache_key), response in zip(missing, responses):
+        if response is not None:
+            series = series_by_key[key] = TimeSeries.from_response(response, "daily", names)
+            series_cache.set(cache_key, series)
+
+    for key, series in series_by_key.items():
+        try:
+            results[key] = functions._get_today_weather_data_output(series, target_date)
+        except Exception as e:
+            print(f"Exception: {key}: {e}")
+    return results
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# How long each kind of Open-Meteo data stays fresh, and the background worker
+# that refreshes just-expired entries while callers are served the stale copy.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import grid
+
+# Seconds a response stays fresh, per endpoint
+ENDPOINT_TTL: Dict[str, int] = {
+    "https://api.open-meteo.com/v1/forecast": 3600,
+    "https://air-quality-api.open-meteo.com/v1/air-quality": 3600,
+    "https://marine-api.open-meteo.com/v1/marine": 3 * 3600,
+    "https://flood-api.open-meteo.com/v1/flood": 6 * 3600,
+    "https://climate-api.open-meteo.com/v1/climate": 30 * 24 * 3600,
+}
+# Requested blocks that go stale sooner than the rest of their endpoint
+PARAM_TTL: Dict[str, int] = {
+    "current": 15 * 60,
+    "minutely_15": 15 * 60,
+}
+DEFAULT_TTL = 3600
+# Seconds past expiry an entry may still be served while a refresh runs in the background
+STALE_WHILE_REVALIDATE = 300
+
+
+def ttl_for(url: str, params: Optional[dict] = None, default: int = DEFAULT_TTL) -> int:
+    """Freshness of a request: its endpoint's TTL, shortened by any short-lived block it asks for."""
+    ttl = ENDPOINT_TTL.get(grid.endpoint_of(url), default)
+    for name, param_ttl in PARAM_TTL.items():
+        if params and name in params:
+            ttl = min(ttl, param_ttl)
+    return ttl
+
+
+class BackgroundRefresher:
+    """
+    Runs refreshes off the request path, at most one per key at a time.
+
+    Args:
+        max_workers (int, optional): Refreshes running at once. Defaults to 2.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.refreshed = 0
+        self.failed = 0
+
+    def _run(self, key: Hashable, refresh: Callable):
+        try:
+            refresh()
+            self.refreshed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Background refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def submit(self, key: Hashable, refresh: Callable) -> bool:
+        """Schedules refresh() unless one is already pending for key."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cache-refresh")
+            executor = self._executor
+        executor.submit(self._run, key, refresh)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+class DataVersions:
+    """
+    Counts upstream refreshes per endpoint and place, so results derived from the
+    data (such as cached answers) can tell whether it changed since.
+    """
+
+    def __init__(self):
+        self._versions: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(url: str, params: dict):
+        # Snapped points, the same whether params were canonicalized or not
+        return [(grid.endpoint_of(url), point) for point in grid.snapped_points(url, params)]
+
+    def bump(self, url: str, params: dict):
+        """Records that the data of a request (params as the caller passed them) was refetched upstream."""
+        with self._lock:
+            for key in self._keys(url, params):
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def snapshot(self, requests: Iterable[Tuple[str, dict]]) -> Dict[Tuple, int]:
+        """Current version of every place the (url, params) requests read."""
+        with self._lock:
+            return {key: self._versions.get(key, 0) for url, params in requests for key in self._keys(url, params)}
+
+    def changed(self, snapshot: Dict[Tuple, int]) -> bool:
+        with self._lock:
+            return any(self._versions.get(key, 0) != version for key, version in snapshot.items())
+
+
+refresher = BackgroundRefresher()
+data_versions = DataVersions()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+# Table-driven labels for weather codes and air quality indices. Each labeller
+# takes a scalar or a whole hourly/daily array and returns labels of the same
+# shape: codes are looked up by array indexing and AQI values are bucketed
+# with np.searchsorted on the category breakpoints, so a full series is
+# labelled in one call.
+
+from typing import Optional
+
+import numpy as np
+
+# WMO weather interpretation codes used by Open-Meteo
+WEATHER_CODES = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Drizzle with Light intensity",
+    53: "Drizzle with Moderate intensity",
+    55: "Drizzle with Dense intensity",
+    56: "Freezing Drizzle: Light intensity",
+    57: "Freezing Drizzle: Dense intensity",
+    61: "Rain with Slight intensity",
+    63: "Rain with Moderate intensity",
+    65: "Rain with Heavy intensity",
+    66: "Freezing Rain with Light intensity",
+    67: "Freezing Rain with Heavy intensity",
+    71: "Snowfall with Slight intensity",
+    73: "Snowfall with Moderate intensity",
+    75: "Snowfall with Heavy intensity",
+    77: "Snow grains",
+    80: "Rain showers with Slight intensity",
+    81: "Rain showers with Moderate intensity",
+    82: "Rain showers with Violent intensity",
+    85: "Snow showers with Slight",
+    86: "Snow showers with Heavy",
+    95: "Thunderstorm with Slight or moderate",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail",
+}
+UNKNOWN_WEATHER_CODE = "Unknown weather code"
+# Thunderstorm (with hail) codes are only forecast for Central Europe
+THUNDERSTORM_CODES = (95, 96, 99)
+THUNDERSTORM_UNAVAILABLE = "Thunderstorm with hail warning is not available outside Central Europe"
+CENTRAL_EUROPE_CITIES = frozenset([
+    "Berlin", "Vienna", "Prague", "Budapest", "Warsaw", "Bratislava", "Ljubljana", "Zagreb", "Munich",
+    "Frankfurt", "Zurich", "Geneva", "Milan", "Rome", "Madrid", "Paris", "Brussels", "Amsterdam",
+])
+
+# Lower bound of each European AQI category
+EUROPEAN_AQI_BREAKPOINTS = np.array([0, 20, 40, 60, 80, 100], dtype=float)
+EUROPEAN_AQI_LABELS = ("Good", "Fair", "Moderate", "Poor", "Very Poor", "Extremely Poor")
+# Upper bound (inclusive) of each US AQI category
+US_AQI_BREAKPOINTS = np.array([50, 100, 150, 200, 300, 500], dtype=float)
+US_AQI_LABELS = ("Good", "Moderate", "Unhealthy for Sensitive Groups", "Unhealthy", "Very Unhealthy", "Hazardous")
+INVALID_AQI = "Invalid AQI value"
+
+
+def _code_table(central_europe: bool) -> np.ndarray:
+    descriptions = [WEATHER_CODES.get(code, UNKNOWN_WEATHER_CODE) for code in range(100)]
+    if not central_europe:
+        for code in THUNDERSTORM_CODES:
+            descriptions[code] = THUNDERSTORM_UNAVAILABLE
+    return np.array(descriptions)
+
+
+# Description per code 0-99, with and without the Central Europe thunderstorm forecast
+_WEATHER_TABLES = {True: _code_table(True), False: _code_table(False)}
+_EUROPEAN_AQI_TABLE = np.array(EUROPEAN_AQI_LABELS + (INVALID_AQI,))
+_US_AQI_TABLE = np.array(US_AQI_LABELS + (INVALID_AQI,))
+
+
+def weather_code_descriptions(codes, city_location: Optional[str] = "") -> np.ndarray:
+    """
+    Descriptions of WMO weather codes.
+
+    Args:
+        codes (int or array-like): Weather code(s); floats must be whole numbers.
+        city_location (str, optional): City, for the Central Europe thunderstorm forecast. Defaults to "".
+
+    Returns:
+        numpy.ndarray: Descriptions, with the shape of codes (0-d for a scalar).
+    """
+    codes = np.asarray(codes, dtype=float)
+    valid = np.isfinite(codes) & (codes >= 0) & (codes < 100) & (codes == np.round(codes))
+    index = np.where(valid, codes, 0).astype(np.intp)
+    table = _WEATHER_TABLES[city_location in CENTRAL_EUROPE_CITIES]
+    return np.where(valid, table[index], UNKNOWN_WEATHER_CODE)
+
+
+def european_aqi_categories(values) -> np.ndarray:
+    """Index into EUROPEAN_AQI_LABELS per value; len(EUROPEAN_AQI_LABELS) for negative or missing values."""
+    values = np.asarray(values, dtype=float)
+    categories = np.searchsorted(EUROPEAN_AQI_BREAKPOINTS, values, side="right") - 1
+    return np.where(values >= 0, categories, len(EUROPEAN_AQI_LABELS))
+
+
+def us_aqi_categories(values) -> np.ndarray:
+    """Index into US_AQI_LABELS per value; len(US_AQI_LABELS) for values outside 0-500 or missing."""
+    values = np.asarray(values, dtype=float)
+    categories = np.searchsorted(US_AQI_BREAKPOINTS, values, side="left")
+    return np.where(values >= 0, categories, len(US_AQI_LABELS))
+
+
+def european_aqi_labels(values) -> np.ndarray:
+    """European AQI category names, with the shape of values."""
+    return _EUROPEAN_AQI_TABLE[european_aqi_categories(values)]
+
+
+def us_aqi_labels(values) -> np.ndarray:
+    """US AQI category names, with the shape of values."""
+    return _US_AQI_TABLE[us_aqi_categories(values)]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+# Per-year and per-decade climate aggregates. The first climate request for a
+# grid cell and model fetches the whole projection once, reduces it in one
+# vectorized pass and keeps the small table in memory and on disk, so later
+# year, range and anomaly questions never refetch the century of daily values.
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import grid
+from timeseries import TimeSeries
+
+CLIMATE_VARIABLES = ("temperature_2m_max", "temperature_2m_min", "precipitation_sum")
+
+
+def _grouped(groups: np.ndarray, values: np.ndarray, size: int):
+    # NaN-aware per-group sums and counts, matching pandas' skipna behaviour
+    valid = ~np.isnan(values)
+    sums = np.bincount(groups, weights=np.where(valid, values, 0.0), minlength=size)
+    counts = np.bincount(groups, weights=valid, minlength=size)
+    return sums, counts
+
+
+class ClimateAggregates:
+    """
+    Yearly sums and valid-day counts per variable, plus decade means and totals.
+
+    Means are sums / counts, so any span of years reduces exactly from the table.
+    """
+
+    def __init__(self, first_year: int, sums: Dict[str, np.ndarray], counts: Dict[str, np.ndarray],
+                 days: np.ndarray):
+        self.first_year = int(first_year)
+        self.sums = sums
+        self.counts = counts
+        self.days = days
+
+    @classmethod
+    def from_series(cls, series: TimeSeries) -> "ClimateAggregates":
+        years = series.view().times().astype("datetime64[s]").astype("datetime64[Y]").astype(np.int64) + 1970
+        first_year = int(years[0])
+        groups = years - first_year
+        size = int(groups[-1]) + 1
+        sums, counts = {}, {}
+        for name in CLIMATE_VARIABLES:
+            sums[name], counts[name] = _grouped(groups, series.variables[name].astype(np.float64), size)
+        days = np.bincount(groups, minlength=size)
+        return cls(first_year, sums, counts, days)
+
+    @property
+    def last_year(self) -> int:
+        return self.first_year + len(self.days) - 1
+
+    def _span(self, start_year: int, end_year: int) -> Optional[Dict[str, float]]:
+        lo = max(int(start_year), self.first_year) - self.first_year
+        hi = min(int(end_year), self.last_year) - self.first_year + 1
+        if hi <= lo or not self.days[lo:hi].any():
+            return None
+        result = {}
+        for name in CLIMATE_VARIABLES:
+            total = float(self.sums[name][lo:hi].sum())
+            count = float(self.counts[name][lo:hi].sum())
+            if name == "precipitation_sum":
+                # Mean yearly total over the span
+                result[name] = total / (hi - lo)
+            else:
+                result[name] = total / count if count else float("nan")
+        return result
+
+    def year(self, year) -> Optional[Dict[str, float]]:
+        """Mean max/min temperature and precipitation total of one year."""
+        return self._span(year, year)
+
+    def years(self, start_year, end_year) -> Optional[Dict[str, float]]:
+        """Means over the years, with precipitation as the mean yearly total."""
+        return self._span(start_year, end_year)
+
+    def decade(self, year) -> Optional[Dict[str, float]]:
+        start = int(year) // 10 * 10
+        return self._span(start, start + 9)
+
+    def anomaly(self, year, baseline: Tuple[int, int] = (1961, 1990)) -> Optional[Dict[str, float]]:
+        """Difference between a year and the mean of the baseline years."""
+        target, reference = self.year(year), self.years(*baseline)
+        if target is None or reference is None:
+            return None
+        return {name: target[name] - reference[name] for name in CLIMATE_VARIABLES}
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"first_year": np.array(self.first_year), "days": self.days.astype(np.int16)}
+        for name in CLIMATE_VARIABLES:
+            arrays[f"sum_{name}"] = self.sums[name].astype(np.float32)
+            arrays[f"count_{name}"] = self.counts[name].astype(np.int16)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "ClimateAggregates":
+        sums = {name: arrays[f"sum_{name}"].astype(np.float64) for name in CLIMATE_VARIABLES}
+        counts = {name: arrays[f"count_{name}"].astype(np.float64) for name in CLIMATE_VARIABLES}
+        return cls(int(arrays["first_year"]), sums, counts, arrays["days"].astype(np.int64))
+
+
+class ClimateStore:
+    """
+    Aggregates keyed by (model, grid point), in memory and as compressed .npz files.
+
+    Args:
+        path (str, optional): Directory for the persisted tables. Defaults to ".climate_store".
+    """
+
+    def __init__(self, path: str = ".climate_store"):
+        self.path = path
+        self._tables: Dict[Tuple, ClimateAggregates] = {}
+        self._lock = threading.Lock()
+
+    def key(self, url: str, params: dict) -> Tuple:
+        _, points = grid.canonicalize(url, params)
+        return (params.get("models", ""),) + points[0]
+
+    def _file(self, key) -> str:
+        model, latitude, longitude = key
+        return os.path.join(self.path, f"{model}_{latitude:.4f}_{longitude:.4f}.npz")
+
+    def get(self, key) -> Optional[ClimateAggregates]:
+        with self._lock:
+            table = self._tables.get(key)
+            if table is None and os.path.exists(self._file(key)):
+                with np.load(self._file(key)) as arrays:
+                    table = self._tables[key] = ClimateAggregates.from_arrays(arrays)
+            return table
+
+    def put(self, key, table: ClimateAggregates):
+        with self._lock:
+            self._tables[key] = table
+            os.makedirs(self.path, exist_ok=True)
+            np.savez_compressed(self._file(key), **table.to_arrays())
+
+
+_store: Optional[ClimateStore] = None
+
+
+def get_climate_store(**kwargs) -> ClimateStore:
+    # kwargs apply on first use only
+    global _store
+    if _store is None:
+        _store = ClimateStore(**kwargs)
+    return _store
+
+
+def aggregate_response(response) -> ClimateAggregates:
+    return ClimateAggregates.from_series(TimeSeries.from_response(response, "daily", CLIMATE_VARIABLES))
+
+
+def climate_aggregates(openmeteo, url: str, params: dict) -> ClimateAggregates:
+    """The stored table for the request's grid point and model, fetched and reduced on first use."""
+    store = get_climate_store()
+    key = store.key(url, params)
+    table = store.get(key)
+    if table is None:
+        # Only the reduced table is kept; the century of raw daily values is not cached
+        responses = openmeteo.weather_api(url, params=params, cache_raw=False)
+        table = aggregate_response(responses[0])
+        store.put(key, table)
+    return table
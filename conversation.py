@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+
+# run_conversation from function_calling_latest.ipynb as an importable module,
+# with the tool calls of a turn dispatched concurrently.
+
+import asyncio
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Generator, Iterator, List, Optional, Tuple
+
+import functions
+from answer_cache import answer_key, get_answer_cache
+from intent import select_families
+from tool_registry import registry
+from turn_planner import TurnPlanner
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+MODEL = "gpt-3.5-turbo-1106"
+# Defaults of the run_conversation/stream_conversation keyword arguments of the same purpose.
+# Send the compact tool schemas (see ToolRegistry.token_report for the saving); off because
+# they drop the descriptions the model may need to pick tools and fill arguments correctly
+COMPACT_TOOLS = False
+# Send only the tool families the request needs, see intent.select_families; off because a
+# keyword the classifier misses leaves the model without the tool it needs
+SUBSET_TOOLS = False
+# Reuse the final answer of an equivalent recent request, see answer_cache; off because the
+# answer of a differently worded question is returned without asking the model
+ANSWER_CACHE = False
+
+# Tool calls of one turn run on this pool; at most this many at once
+MAX_TOOL_WORKERS = 8
+# Seconds a turn may spend executing tool calls before the stragglers are reported as timed out
+TURN_DEADLINE = 30.0
+
+_client: Optional["OpenAI"] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_openai_client() -> "OpenAI":
+    global _client
+    if _client is None:
+        # openai takes most of a second to import; only pay for it when a model call is made
+        from dotenv import load_dotenv, find_dotenv
+        from openai import OpenAI
+        load_dotenv(find_dotenv())
+        _client = OpenAI()
+    return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS, thread_name_prefix="tool-call")
+    return _executor
+
+
+def _tool_args(arguments: str) -> dict:
+    try:
+        return json.loads(arguments or "{}")
+    except json.JSONDecodeError:
+        print("Error parsing JSON from tool_call.function.arguments")
+        return {}
+
+
+def _plan_turn(calls, requests: Optional[list] = None) -> TurnPlanner:
+    # Register the request each fetcher will make, so tools sharing an endpoint and place share one
+    planner = TurnPlanner(functions.get_openmeteo_client())
+    for function_name, supplied in calls:
+        entry = registry.get(function_name)
+        build_request = entry and getattr(functions, f"_{entry.function.__name__}_request", None)
+        if build_request is None:
+            continue
+        try:
+            function_args = entry.arguments(supplied)
+            url, params = build_request(**{name: function_args.get(name)
+                                           for name in inspect.signature(build_request).parameters})
+        except Exception:
+            continue  # the tool reports its own error when it runs
+        planner.add(url, params)
+        if requests is not None:
+            requests.append((url, params))
+    return planner
+
+
+def _call_tool(function_name: str, supplied: dict, openmeteo=None):
+    entry = registry.get(function_name)
+    if entry is None:
+        return f"Error: unknown function {function_name}"
+    print(f"Function Name: {function_name}")
+    print(f"Function Arguments: {supplied}")
+    # Fetchers get the turn's Open-Meteo client, which the model never supplies
+    return entry(supplied, openmeteo)
+
+
+def _as_content(result) -> str:
+    return result if isinstance(result, str) else json.dumps(result, default=str)
+
+
+def _failed(tool_messages: List[Dict]) -> bool:
+    # Tools print and return None when they fail (sent as "null"); raised or timed-out calls become "Error: ..."
+    return any(m["content"].strip() in ("", "null", "None") or m["content"].startswith("Error")
+               for m in tool_messages)
+
+
+def _run_tool_calls(tool_calls, deadline: float = TURN_DEADLINE,
+                    requests: Optional[list] = None) -> Generator[Dict, None, List[Dict]]:
+    # Yields a progress event as each call finishes and returns the tool messages
+    started = time.monotonic()
+    calls = [(tool_call.function.name, _tool_args(tool_call.function.arguments)) for tool_call in tool_calls]
+    planner = _plan_turn(calls, requests)
+    executor = _get_executor()
+    futures = [executor.submit(_call_tool, function_name, supplied, planner) for function_name, supplied in calls]
+    names = {future: tool_call.function.name for future, tool_call in zip(futures, tool_calls)}
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline - (time.monotonic() - started))):
+            yield {"type": "tool_result", "name": names[future], "ok": future.exception() is None}
+    except FuturesTimeout:
+        pass
+
+    messages = []
+    for tool_call, future in zip(tool_calls, futures):
+        if not future.done():
+            future.cancel()
+            content = f"Error: {tool_call.function.name} did not finish within {deadline} seconds"
+        elif future.exception() is not None:
+            content = f"Error: {future.exception()}"
+        else:
+            content = _as_content(future.result())
+        messages.append({
+            "tool_call_id": tool_call.id,
+            "role": "tool",
+            "name": tool_call.function.name,
+            "content": content,
+        })
+    return messages
+
+
+def dispatch_tool_calls(tool_calls, deadline: float = TURN_DEADLINE, requests: Optional[list] = None) -> List[Dict]:
+    """
+    Runs the tool calls of one turn concurrently on the shared bounded pool.
+
+    Fetchers of the turn that hit the same endpoint at the same place are
+    served from one merged request, see turn_planner.TurnPlanner.
+
+    Args:
+        tool_calls (list): Tool calls from the model response.
+        deadline (float, optional): Seconds to wait for the whole turn. Defaults to TURN_DEADLINE.
+        requests (list, optional): Extended with the (url, params) of each data request of the turn. Defaults to None.
+
+    Returns:
+        list: One tool message per call, in the original tool_call_id order. Calls still
+        running at the deadline, or that raised, get an error message as content.
+    """
+    events = _run_tool_calls(tool_calls, deadline, requests)
+    while True:
+        try:
+            next(events)
+        except StopIteration as done:
+            return done.value
+
+
+def time_to_first_token(main_request: str, compact: bool = COMPACT_TOOLS) -> Dict[str, float]:
+    """
+    Measures the first model call of a turn with the full or compact tool payload.
+
+    Args:
+        main_request (str): User request to send.
+        compact (bool, optional): Send the compact schemas. Defaults to COMPACT_TOOLS.
+
+    Returns:
+        dict: Seconds to the first streamed chunk, seconds to the last, and prompt tokens if reported.
+    """
+    client = get_openai_client()
+    started = time.monotonic()
+    first = None
+    prompt_tokens = None
+    stream = client.chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": main_request}],
+        tools=registry.tools(compact=compact),
+        tool_choice="auto",
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        if first is None and chunk.choices:
+            first = time.monotonic() - started
+        if chunk.usage is not None:
+            prompt_tokens = chunk.usage.prompt_tokens
+    return {"first_token": first, "total": time.monotonic() - started, "prompt_tokens": prompt_tokens}
+
+
+def _flags(compact: Optional[bool], subset: Optional[bool], cache_answers: Optional[bool]) -> Tuple[bool, bool, bool]:
+    # None means the module default, read at call time so changing it still applies
+    return (COMPACT_TOOLS if compact is None else compact, SUBSET_TOOLS if subset is None else subset,
+            ANSWER_CACHE if cache_answers is None else cache_answers)
+
+
+def run_conversation(main_request: str, compact: Optional[bool] = None, subset: Optional[bool] = None,
+                     cache_answers: Optional[bool] = None) -> str:
+    """
+    Answers a request, calling the tools the model asks for.
+
+    Args:
+        main_request (str): The user request.
+        compact (bool, optional): Send the compact tool schemas. Defaults to COMPACT_TOOLS.
+        subset (bool, optional): Send only the tool families the request needs. Defaults to SUBSET_TOOLS.
+        cache_answers (bool, optional): Reuse and store final answers in the answer cache. Defaults to ANSWER_CACHE.
+    """
+    compact, subset, cache_answers = _flags(compact, subset, cache_answers)
+    key = answer_key(main_request) if cache_answers else None
+    if key is not None:
+        answer = get_answer_cache().get(key)
+        if answer is not None:
+            return answer
+    client = get_openai_client()
+    #Step 1 send the conversation and available function to the model
+    messages = [
+        {
+            "role": "user",
+            "content": main_request,
+        }
+    ]
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        tools=registry.tools(compact=compact, families=select_families(main_request) if subset else None),
+        tool_choice="auto",
+    )
+    response_message = response.choices[0].message
+    tool_calls = response_message.tool_calls
+
+    #Step 2 Check if the model want to call a function
+    if not tool_calls:
+        return response_message.content
+
+    #Step 3 Call the functions, concurrently
+    messages.append(response_message)
+    requests = []
+    tool_messages = dispatch_tool_calls(tool_calls, requests=requests)
+    messages.extend(tool_messages)
+
+    #Step 4 Send the function responses back to the model
+    second_response = client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+    )
+    answer = second_response.choices[0].message.content
+    if key is not None and answer and not _failed(tool_messages):
+        get_answer_cache().set(key, answer, requests)
+    return answer
+
+
+def _streamed_tool_calls(deltas: Dict[int, dict]) -> list:
+    # Tool calls arrive in fragments: the id and name once, the arguments piecewise
+    return [SimpleNamespace(id=call["id"], type="function",
+                            function=SimpleNamespace(name=call["name"], arguments=call["arguments"]))
+            for _, call in sorted(deltas.items())]
+
+
+def _stream_completion(client, **kwargs) -> Generator[Dict, None, list]:
+    # Yields token events of one streamed completion and returns the tool calls it made
+    deltas: Dict[int, dict] = {}
+    for chunk in client.chat.completions.create(stream=True, **kwargs):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            yield {"type": "token", "content": delta.content}
+        for fragment in delta.tool_calls or ():
+            call = deltas.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+            if fragment.id:
+                call["id"] = fragment.id
+            if fragment.function is not None:
+                call["name"] += fragment.function.name or ""
+                call["arguments"] += fragment.function.arguments or ""
+    return _streamed_tool_calls(deltas)
+
+
+def stream_conversation(main_request: str, compact: Optional[bool] = None, subset: Optional[bool] = None,
+                        cache_answers: Optional[bool] = None) -> Iterator[Dict]:
+    """
+    run_conversation as a stream of events, so the answer is shown as it is generated.
+
+    Events, in order: one "tool_call" per tool the model calls, one
+    "tool_result" per call as it finishes, then "token" events with the
+    answer text as the model produces it, and a final "done" with the whole answer.
+
+    Args:
+        main_request (str): The user request.
+        compact (bool, optional): Send the compact tool schemas. Defaults to COMPACT_TOOLS.
+        subset (bool, optional): Send only the tool families the request needs. Defaults to SUBSET_TOOLS.
+        cache_answers (bool, optional): Reuse and store final answers in the answer cache. Defaults to ANSWER_CACHE.
+
+    Yields:
+        dict: {"type": "tool_call", "name", "arguments"}, {"type": "tool_result", "name", "ok"},
+        {"type": "token", "content"} or {"type": "done", "content"}.
+    """
+    compact, subset, cache_answers = _flags(compact, subset, cache_answers)
+    key = answer_key(main_request) if cache_answers else None
+    if key is not None:
+        answer = get_answer_cache().get(key)
+        if answer is not None:
+            yield {"type": "token", "content": answer}
+            yield {"type": "done", "content": answer}
+            return
+    client = get_openai_client()
+    messages = [{"role": "user", "content": main_request}]
+    # The first call usually only picks tools, but a direct answer streams as well
+    parts = []
+    first = _stream_completion(
+        client,
+        model=MODEL,
+        messages=messages,
+        tools=registry.tools(compact=compact, families=select_families(main_request) if subset else None),
+        tool_choice="auto",
+    )
+    while True:
+        try:
+            event = next(first)
+        except StopIteration as done:
+            tool_calls = done.value
+            break
+        parts.append(event["content"])
+        yield event
+    if not tool_calls:
+        yield {"type": "done", "content": "".join(parts)}
+        return
+
+    messages.append({
+        "role": "assistant",
+        "content": "".join(parts) or None,
+        "tool_calls": [{"id": call.id, "type": "function",
+                        "function": {"name": call.function.name, "arguments": call.function.arguments}}
+                       for call in tool_calls],
+    })
+    for call in tool_calls:
+        yield {"type": "tool_call", "name": call.function.name, "arguments": _tool_args(call.function.arguments)}
+    requests = []
+    tool_messages = yield from _run_tool_calls(tool_calls, requests=requests)
+    messages.extend(tool_messages)
+
+    parts = []
+    for event in _stream_completion(client, model=MODEL, messages=messages):
+        parts.append(event["content"])
+        yield event
+    answer = "".join(parts)
+    if key is not None and answer and not _failed(tool_messages):
+        get_answer_cache().set(key, answer, requests)
+    yield {"type": "done", "content": answer}
+
+
+async def astream_conversation(main_request: str, **kwargs) -> AsyncIterator[Dict]:
+    """stream_conversation (same keyword arguments) as an async iterator; each event is awaited off the event loop."""
+    loop = asyncio.get_running_loop()
+    events = stream_conversation(main_request, **kwargs)
+    finished = object()
+    while True:
+        event = await loop.run_in_executor(None, next, events, finished)
+        if event is finished:
+            return
+        yield event
@@ -1,75 +0,0 @@
-
-
-#Function args
-{
-    "get_weather_code_description":{
-            "code": None,
-            "city_location":  ""
-    },
-    "convert_timestamp_to_date_and_time":{
-            "timestamp": None,
-            "time_zone": ""
-    },
-    "get_user_input":{
-            "user_date_input": None,
-            "user_hour_input": None
-    },
-    "get_lat_long_from_city":{
-            "city_name": None,
-            "count": None,
-            "language":'en',
-            "format":'json'
-    },
-    "extract_city_info":{
-            "city_name": None,
-            "count": None,
-            "language":'en',
-            "format":'json'
-    },
-    "daily_river_discharge":{
-            "latitude": None,
-            "longitude": None,
-            "target_date": None
-    },
-    "air_quality_data":{
-
-            "latitude": None,
-            "longitude": None,
-            "target_datetime": None
-    },
-    "describe_european_aqi":{
-            "aqi_value": None
-    },
-    "describe_us_aqi":{
-            "aqi_value": None
-    },
-    "describe_current_air_quality_index":{
-            "latitude": None,
-            "longitude": None,
-            "target_datetime": None
-    },
-    "daily_marine_data":{
-            "latitude": None,
-            "longitude": None,
-            "target_datetime": None
-    },
-    "hourly_marine_data":{
-            "latitude": None,
-            "longitude": None,
-            "target_datetime": None
-    },
-    "climate_change_data":{
-            "latitude": None,
-            "longitude": None,
-            "target_year": None
-    },
-    "describe_current_weather":{
-            "latitude": None,
-            "longitude": None,
-    },
-    "get_today_weather_data":{
-            "latitude": None,
-            "longitude": None,
-            "target_date": None
-    },
-}
\ No newline at end of file
@@ -1,75 +1,64 @@
 #!/usr/bin/env python
 
+# Only light modules are imported here: the HTTP stack, the SQLite caches and
+# pandas load on the first tool call, so importing the tools stays fast.
+
 from typing import Optional, List, Tuple, Dict
-from dotenv import load_dotenv, find_dotenv
-from datetime import datetime
-from openai import OpenAI
-import requests
 import json
-import openmeteo_requests
-import requests_cache
-import pandas as pd
-from retry_requests import retry
-from datetime import datetime
-import numpy as np
-from datetime import datetime, timezone
+import math
+from datetime import datetime, timedelta, timezone
+from openmeteo_client import get_registry
+from geocoding import lookup_city
+from timeseries import fetch_series, parse_when
+from planner import DateOutOfRange, plan_days, plan_year, valid_range
+from climate_store import climate_aggregates
+from classifiers import european_aqi_labels, us_aqi_labels, weather_code_descriptions
+from resample import resample
+from series_store import enable_series_store
+from tool_registry import tool
 
 timeformat = "unixtime"
 
 
-def get_openmeteo_client():
-    # Setup the Open-Meteo API client with cache and retry on error
-    cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    return openmeteo_requests.Client(session=retry_session)
-
-openmeteo = get_openmeteo_client()
-
+@tool("Retrieves an Open-Meteo API client configured with caching and retry mechanism.",
+      internal=True,
+      cache_path={"type": "string", "format": "string", "description": "Path to the cache directory. Defaults to '.cache'."},
+      expire_after={"type": "string", "format": "integer", "description": "Cache expiration time in seconds. Defaults to 3600."},
+      retries={"type": "string", "format": "integer", "description": "Number of retries in case of an error. Defaults to 5."},
+      backoff_factor={"type": "string", "format": "float", "description": "Factor by which the delay between retries will increase. Defaults to 0.2."},
+      returns={"type": "object", "properties": {
+          "openmeteo_client": {"type": "object", "description": "Open-Meteo API client instance."}}})
+def get_openmeteo_client(**kwargs):
+    # Shared Open-Meteo API client with cache, retry and per-host keep-alive pools.
+    # kwargs (cache_path, expire_after, retries, backoff_factor, pool_size) apply on first use only
+    return get_registry(**kwargs).client
+
+def _request_exception():
+    # Evaluated only when an exception is being handled, by which time requests is loaded
+    import requests
+    return requests.exceptions.RequestException
+
+# Decoded series persist compactly on disk, under a byte budget, instead of as raw HTTP bodies
+enable_series_store()
+
+@tool("Retrieves a weather description based on the provided weather code and, optionally, the city location.",
+      family="weather",
+      name="get_weather_code_description",
+      code="Weather code.",
+      city_location="City location for specific thunderstorm warnings. Optional.",
+      returns={"type": "string", "description": "Weather description or a message indicating unknown weather code. If thunderstorm warning is not applicable outside Central Europe, an additional message is returned."},
+      note="Central Europe cities are considered for thunderstorm warnings (codes 95, 96, 99). Additional cities can be added to `CENTRAL_EUROPE_CITIES` in classifiers.py. Weather codes are mapped to descriptive strings in its `WEATHER_CODES` table.")
 def get_weather_description(code: int , city_location: Optional[str] = "") -> Optional[str]:
-    # Central_Europe_cities
-    central_europe_cities = ["Berlin","Vienna","Prague","Budapest","Warsaw","Bratislava","Ljubljana","Zagreb","Munich","Frankfurt","Zurich","Geneva","Milan","Rome","Madrid","Paris","Brussels","Amsterdam" # Add more cities as needed
-    ]
-    # Weather Codes
-    weather_codes = {
-        0: "Clear sky",
-        1: "Mainly clear",
-        2: "Partly cloudy",
-        3: "Overcast",
-        45: "Fog",
-        48: "Depositing rime fog",
-        51: "Drizzle with Light intensity",
-        53: "Drizzle with Moderate intensity",
-        55: "Drizzle with Dense intensity",
-        56: "Freezing Drizzle: Light intensity",
-        57: "Freezing Drizzle: Dense intensity",
-        61: "Rain with Slight intensity",
-        63: "Rain with Moderate intensity",
-        65: "Rain with Heavy intensity",
-        66: "Freezing Rain with Light intensity",
-        67: "Freezing Rain with Heavy intensity",
-        71: "Snowfall with Slight intensity",
-        73: "Snowfall with Moderate intensity",
-        75: "Snowfall with Heavy intensity",
-        77: "Snow grains",
-        80: "Rain showers with Slight intensity",
-        81: "Rain showers with Moderate intensity",
-        82: "Rain showers with Violent intensity",
-        85: "Snow showers with Slight",
-        86: "Snow showers with Heavy",
-        95: "Thunderstorm with Slight or moderate",
-        96: "Thunderstorm with slight hail",
-        99: "Thunderstorm with heavy hail"
-    }
-
-    # Check if the code is in the dictionary
-    if code in weather_codes:
-        if code in [95, 96, 99] and city_location not in central_europe_cities:
-            return "Thunderstorm with hail warning is not available outside Central Europe"
-        else:
-            return weather_codes[code]
-    else:
-        return "Unknown weather code"
-
+    return weather_code_descriptions(code, city_location).item()
+
+@tool("Converts a Unix timestamp to a date and time string.",
+      timestamp="Unix timestamp.",
+      time_zone={"type": "string", "description": "Time zone for the unixtime."},
+      returns={"type": "tuple", "items": [
+                   {"type": "string", "description": "Date string formatted as \"%d-%m-%Y\"."},
+                   {"type": "string", "description": "Time string formatted as \"%H:%M\"."}],
+               "description": "Returns a tuple containing date and time strings. Returns (None, None) in case of an error."},
+      note="The date is formatted as \"%d-%m-%Y\". The time is formatted as \"%H:%M\".")
 def convert_timestamp_to_date_and_time(timestamp, time_zone=timezone.utc):
     try:
         dt_object = datetime.fromtimestamp(timestamp, time_zone)
@@ -80,6 +69,11 @@ def convert_timestamp_to_date_and_time(timestamp, time_zone=timezone.utc):
         print(f"Error converting timestamp to date and time: {e}")
         return None, None
 
+@tool("Validates user input for date and hour, and returns a formatted datetime string.",
+      user_date_input="User-provided date input.",
+      user_hour_input="User-provided hour input.",
+      returns={"type": "string", "description": "Formatted datetime string or None if input is invalid."},
+      note="Supports date formats: \"%Y/%m/%d\", \"%d-%m-%Y\", \"%Y-%m-%d\", \"%d/%m/%Y\". Validates the hour is a valid integer in the range [0, 23].")
 def get_user_input(user_date_input,user_hour_input):
     date_formats = ["%Y/%m/%d", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y"]
 
@@ -116,81 +110,93 @@ def get_user_input(user_date_input,user_hour_input):
     # Now you can use target_datetime in your air_quality_data function
     # result = air_quality_data(openmeteo, latitude, longitude, target_datetime)
 
-def get_lat_long_from_city(city_name: str, count: int = 1, language: str = 'en', format: str = 'json') -> Optional[Tuple[float, float]]:
-    api_url: str = "https://geocoding-api.open-meteo.com/v1/search"
-    params = {
-        'name': city_name,
-        'count': count,
-        'language': language,
-        'format': format
-    }
+def _lat_long_output(record):
+    if record:
+        longitude = record['longitude']
+        latitude = record['latitude']
+        return float(longitude), float(latitude)
+    else:
+        print("Error: Unable to retrieve coordinates for the requested city.")
+        return None
 
+@tool("Retrieves the latitude and longitude coordinates for a given city name.",
+      family="geocoding",
+      city_name="Name of the city.",
+      count="Number of results to return (default is 1).",
+      language="Language for the response (default is 'en').",
+      format="Response format (default is 'json').",
+      returns={"type": "tuple", "items": [
+                   {"type": "float", "description": "Longitude coordinate."},
+                   {"type": "float", "description": "Latitude coordinate."}],
+               "description": "Returns a tuple containing latitude and longitude coordinates. Returns None in case of an error."},
+      note="Uses the Open-Meteo geocoding API: https://geocoding-api.open-meteo.com/v1/search. The count parameter determines the number of results to return.")
+def get_lat_long_from_city(city_name: str, count: int = 1, language: str = 'en', format: str = 'json') -> Optional[Tuple[float, float]]:
+    # Served from the shared geocoding cache; the same record also backs extract_city_info
     try:
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()  # Raise an exception for bad responses (4xx and 5xx)
-        result = response.json()
-        # print(result)
-        if result:
-            longitude = result['results'][0]['longitude']
-            latitude = result['results'][0]['latitude']
-            return float(longitude), float(latitude)
-        else:
-            print(f"Error: Unable to retrieve coordinates. API response: {result}")
-            return None
-    except requests.exceptions.RequestException as e:
+        return _lat_long_output(lookup_city(city_name, language))
+    except _request_exception() as e:
         print(f"Request Exception: {e}")
         return None
     except Exception as e:
         print(f"Exception: {e}")
         return None
 
+def _city_info_output(record):
+    if record:
+        city_name = record['name']
+        latitude = record['latitude']
+        longitude = record['longitude']
+        population = record['population']
+        country = record['country']
+        country_code = record['country_code']
+        elevation = record['elevation']
+        timezone = record['timezone']
+        
+        print(f"City Name: {city_name}")
+        print(f"Latitude: {latitude}")
+        print(f"Longitude: {longitude}")
+        print(f"Population: {population}")
+        print(f"Country: {country}")
+        print(f"Country Code: {country_code}")
+        print(f"Elevation: {elevation}")
+        print(f"Timezone: {timezone}")
+        
+        json_output = {
+                                "City Name": city_name,
+                                "Latitude": latitude,
+                                "Longitude": longitude,
+                                "Population": population,
+                                "Country": country,
+                                "Country Code": country_code,
+                                "Elevation": elevation,
+                                "Timezone": timezone
+                            }
+        
+        return json_output
+    else:
+        print("Error: Unable to extract the city info for the requested city.")
+        return None
+
+@tool("Extracts information about a city using the Open-Meteo geocoding API.",
+      family="geocoding",
+      city_name="Name of the city.",
+      count="Number of results to return (default is 1).",
+      language="Language for the response (default is 'en').",
+      format="Response format (default is 'json').",
+      returns={"type": "object", "description": "Dictionary containing city information. Returns None in case of an error.",
+               "properties": {
+                   "City Name": {"type": "string", "description": "Name of the city."},
+                   "Latitude": {"type": "float", "description": "Latitude coordinate."},
+                   "Longitude": {"type": "float", "description": "Longitude coordinate."},
+                   "Population": {"type": "integer", "description": "Population of the city."},
+                   "Country": {"type": "string", "description": "Country where the city is located."},
+                   "Country Code": {"type": "string", "description": "Country code of the city."},
+                   "Elevation": {"type": "float", "description": "Elevation of the city."},
+                   "Timezone": {"type": "string", "description": "Timezone of the city."}}},
+      note="Uses the Open-Meteo geocoding API: https://geocoding-api.open-meteo.com/v1/search.")
 def extract_city_info(city_name: str, count: int = 1, language: str = 'en', format: str = 'json') -> Optional[Tuple[str, float, float, int, str, str, float, str]]:
-    api_url: str = "https://geocoding-api.open-meteo.com/v1/search"
-    params = {
-        'name': city_name,
-        'count': count,
-        'language': language,
-        'format': format
-    }
     try:
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()  # Raise an exception for bad responses (4xx and 5xx)
-        results = response.json()
-        
-        if results:
-            city_name = results['results'][0]['name']
-            latitude = results['results'][0]['latitude']
-            longitude = results['results'][0]['longitude']
-            population = results['results'][0]['population']
-            country = results['results'][0]['country']
-            country_code = results['results'][0]['country_code']
-            elevation = results['results'][0]['elevation']
-            timezone = results['results'][0]['timezone']
-            
-            print(f"City Name: {city_name}")
-            print(f"Latitude: {latitude}")
-            print(f"Longitude: {longitude}")
-            print(f"Population: {population}")
-            print(f"Country: {country}")
-            print(f"Country Code: {country_code}")
-            print(f"Elevation: {elevation}")
-            print(f"Timezone: {timezone}")
-            
-            json_output = {
-                                    "City Name": city_name,
-                                    "Latitude": latitude,
-                                    "Longitude": longitude,
-                                    "Population": population,
-                                    "Country": country,
-                                    "Country Code": country_code,
-                                    "Elevation": elevation,
-                                    "Timezone": timezone
-                                }
-            
-            return json_output
-        else:
-            print(f"Error: Unable to extract the city info. API response: {results}")
-            return None
+        return _city_info_output(lookup_city(city_name, language))
 
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
@@ -199,57 +205,52 @@ def extract_city_info(city_name: str, count: int = 1, language: str = 'en', form
         print(f"Exception: {e}")
         return None
 
-def daily_river_discharge(openmeteo, latitude, longitude, target_date):
+def _daily_river_discharge_request(latitude, longitude, target_date):
     url = "https://flood-api.open-meteo.com/v1/flood"
     params = {
         "latitude": latitude,
         "longitude": longitude,
         "daily": "river_discharge",
         "timeformat": "unixtime",
-        "past_days": 92,
-        "forecast_days": 92,
+        **plan_days(url, target_date),
     }
+    return url, params
+
+def _daily_river_discharge_output(series, target_date):
+    # Row for the target date by offset from the start of the cached series
+    target_date = parse_when(target_date)
+    discharge_value = series.value("river_discharge", target_date)
+
+    if discharge_value is not None:
+        formatted_date = target_date.strftime("%d-%m-%Y")
+        rounded_discharge = round(discharge_value, 4)
+        print(f"River discharge on {formatted_date}: {rounded_discharge} m³/s")
+        json_output = {
+                        "Date": formatted_date,
+                        "River discharge":rounded_discharge
+                        }
+        return json_output
+    else:
+        formatted_date = target_date.strftime("%d-%m-%Y")
+        print(f"No data available for {formatted_date}")
+        return None
 
+@tool("Retrieves daily river discharge data for a specific location and target date.",
+      family="flood",
+      returns={"type": "object", "description": "Dictionary containing the date and river discharge. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Date": {"type": "string", "description": "Formatted date of the river discharge."},
+                   "River discharge": {"type": "number", "description": "River discharge value in m³/s."}}},
+      note="Uses the Open-Meteo flood API: https://flood-api.open-meteo.com/v1/flood.")
+def daily_river_discharge(openmeteo, latitude, longitude, target_date):
     try:
-        # Assuming openmeteo.weather_api returns a list of responses
-        responses = openmeteo.weather_api(url, params=params)
-
-        # Assuming response.Daily() returns the daily data
-        response = responses[0].Daily()
-
-        # Assuming response.Variables(0).ValuesAsNumpy() returns river discharge values
-        daily_river_discharge = response.Variables(0).ValuesAsNumpy()
-
-        daily_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(response.Time(), unit="s"),
-                end=pd.to_datetime(response.TimeEnd(), unit="s"),
-                freq=pd.Timedelta(seconds=response.Interval()),
-                inclusive="left"
-            )
-        }
-
-        daily_data["river_discharge"] = daily_river_discharge
-        daily_dataframe = pd.DataFrame(data=daily_data)
-
-        # Filter the DataFrame for the target date
-        target_date = pd.to_datetime(target_date)
-        discharge_value = daily_dataframe[daily_dataframe['date'] == target_date]['river_discharge'].values
-
-        if len(discharge_value) > 0:
-            formatted_date = target_date.strftime("%d-%m-%Y")
-            rounded_discharge = round(float(discharge_value[0]), 4)
-            print(f"River discharge on {formatted_date}: {rounded_discharge} m³/s")
-            json_output = {
-                            "Date": formatted_date,
-                            "River discharge":rounded_discharge
-                            }
-            return json_output
-        else:
-            formatted_date = target_date.strftime("%d-%m-%Y")
-            print(f"No data available for {formatted_date}")
-            return None
+        url, params = _daily_river_discharge_request(latitude, longitude, target_date)
+        series = fetch_series(openmeteo, url, params, "daily", target_date)
+        return _daily_river_discharge_output(series, target_date)
 
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
         return None
@@ -257,68 +258,76 @@ def daily_river_discharge(openmeteo, latitude, longitude, target_date):
         print(f"Exception: {e}")
         return None
 
-def air_quality_data(openmeteo, latitude, longitude, target_datetime):
+def _air_quality_data_request(latitude, longitude, target_datetime):
     url = "https://air-quality-api.open-meteo.com/v1/air-quality"
     params = {
         "latitude": latitude,
         "longitude": longitude,
         "hourly": ["pm10", "pm2_5", "aerosol_optical_depth", "dust"],
         "timeformat": "unixtime",
-        "past_days": 92,
+        # Local time, so the target hour and the daily summary follow the location's day
+        "timezone": "auto",
+        **plan_days(url, target_datetime),
     }
+    return url, params
 
-    try:
-        # Assuming openmeteo.weather_api returns a list of responses
-        responses = openmeteo.weather_api(url, params=params)
+def _daily_summary(series, labels, target_datetime):
+    # Min/max/mean/90th percentile of each variable over the target's local day, from the fetched hours
+    day = parse_when(target_datetime).date()
+    summary = resample(series, names=list(labels), percentiles=(90,), start=day, end=day + timedelta(days=1)).at(day)
+    if summary is None:
+        return None
+    # NaN (a day without valid values) becomes null rather than invalid JSON
+    return {labels[name]: {stat: round(value, 4) if math.isfinite(value) else None for stat, value in stats.items()}
+            for name, stats in summary.items()}
+
+def _air_quality_data_output(series, target_datetime):
+    # Row for the target hour by offset from the start of the cached series
+    target_datetime = parse_when(target_datetime)
+    target_data = series.row(target_datetime)
+
+    if target_data is not None:
+        formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
+        print(f"AQI data on {formatted_datetime}:")
+        print(f"PM10: {round(target_data['pm10'], 4)} µg/m³")
+        print(f"PM2.5: {round(target_data['pm2_5'], 4)} µg/m³")
+        print(f"Aerosol Optical Depth: {round(target_data['aerosol_optical_depth'], 4)}")
+        print(f"Dust: {round(target_data['dust'], 4)}")
+        json_output = {
+                        "Date and Time": formatted_datetime,
+                        "PM 10": f"{round(target_data['pm10'], 4)} µg/m³",
+                        "PM 2.5":f"{round(target_data['pm2_5'], 4)} µg/m³",
+                        "Aerosol Optical Depth": f"{round(target_data['aerosol_optical_depth'], 4)}",
+                        "dust": f"{round(target_data['dust'], 4)}",
+                        "Daily Summary": _daily_summary(series, {"pm10": "PM 10 (µg/m³)", "pm2_5": "PM 2.5 (µg/m³)",
+                                                                 "dust": "Dust (µg/m³)"}, target_datetime)
+                    }
+        return json_output
+    else:
+        formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"No data available for {formatted_datetime}")
+        return None
 
-        # Assuming response.Hourly() returns the hourly data
-        response = responses[0].Hourly()
-
-        # Assuming response.Variables(index) returns the hourly data for the specified index
-        hourly_pm10 = response.Variables(0).ValuesAsNumpy()
-        hourly_pm2_5 = response.Variables(1).ValuesAsNumpy()
-        hourly_aerosol_optical_depth = response.Variables(2).ValuesAsNumpy()
-        hourly_dust = response.Variables(3).ValuesAsNumpy()
-
-        hourly_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(response.Time(), unit="s"),
-                end=pd.to_datetime(response.TimeEnd(), unit="s"),
-                freq=pd.Timedelta(seconds=response.Interval()),
-                inclusive="left"
-            )
-        }
-        hourly_data["pm10"] = hourly_pm10
-        hourly_data["pm2_5"] = hourly_pm2_5
-        hourly_data["aerosol_optical_depth"] = hourly_aerosol_optical_depth
-        hourly_data["dust"] = hourly_dust
-
-        hourly_dataframe = pd.DataFrame(data=hourly_data)
-
-        # Filter the DataFrame for the target datetime
-        target_datetime = pd.to_datetime(target_datetime)
-        target_data = hourly_dataframe[hourly_dataframe['date'] == target_datetime]
-
-        if not target_data.empty:
-            formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
-            print(f"AQI data on {formatted_datetime}:")
-            print(f"PM10: {round(float(target_data['pm10'].values[0]), 4)} µg/m³")
-            print(f"PM2.5: {round(float(target_data['pm2_5'].values[0]), 4)} µg/m³")
-            print(f"Aerosol Optical Depth: {round(float(target_data['aerosol_optical_depth'].values[0]), 4)}")
-            print(f"Dust: {round(float(target_data['dust'].values[0]), 4)}")
-            json_output = {
-                            "Date and Time": formatted_datetime,
-                            "PM 10": f"{round(float(target_data['pm10'].values[0]), 4)} µg/m³",
-                            "PM 2.5":f"{round(float(target_data['pm2_5'].values[0]), 4)} µg/m³",
-                            "Aerosol Optical Depth": f"{round(float(target_data['aerosol_optical_depth'].values[0]), 4)}",
-                            "dust": f"{round(float(target_data['dust'].values[0]), 4)}"
-                        }
-            return json_output
-        else:
-            formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
-            print(f"No data available for {formatted_datetime}")
-            return None
+@tool("Retrieves air quality data for a specific location and target datetime.",
+      family="air_quality",
+      returns={"type": "object", "description": "Dictionary containing air quality data. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Date and Time": {"type": "string", "description": "Formatted date and time of the air quality data."},
+                   "PM 10": {"type": "string", "description": "PM 10 value in µg/m³."},
+                   "PM 2.5": {"type": "string", "description": "PM 2.5 value in µg/m³."},
+                   "Aerosol Optical Depth": {"type": "string", "description": "Aerosol Optical Depth value."},
+                   "Dust": {"type": "string", "description": "Dust value."},
+                   "Daily Summary": {"type": "object", "description": "Min, max, mean and 90th percentile of PM 10, PM 2.5 and dust over the local day."}}},
+      note="Uses the Open-Meteo air quality API: https://air-quality-api.open-meteo.com/v1/air-quality.")
+def air_quality_data(openmeteo, latitude, longitude, target_datetime):
+    try:
+        url, params = _air_quality_data_request(latitude, longitude, target_datetime)
+        series = fetch_series(openmeteo, url, params, "hourly", target_datetime)
+        return _air_quality_data_output(series, target_datetime)
 
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
         return None
@@ -326,103 +335,78 @@ def air_quality_data(openmeteo, latitude, longitude, target_datetime):
         print(f"Exception: {e}")
         return None
 
+@tool("Describes the European Air Quality Index based on the given AQI value.",
+      family="air_quality",
+      aqi_value="Air Quality.",
+      returns={"type": "string", "description": "Description of the air quality."},
+      note="AQI ranges and descriptions are based on European standards.")
 def describe_european_aqi(aqi_value):
-    if 0 <= aqi_value < 20:
-        return "Good"
-    elif 20 <= aqi_value < 40:
-        return "Fair"
-    elif 40 <= aqi_value < 60:
-        return "Moderate"
-    elif 60 <= aqi_value < 80:
-        return "Poor"
-    elif 80 <= aqi_value < 100:
-        return "Very Poor"
-    elif aqi_value >= 100:
-        return "Extremely Poor"
-    else:
-        return "Invalid AQI value"
+    return european_aqi_labels(aqi_value).item()
 
+@tool("Describes the US Air Quality Index based on the given AQI value.",
+      family="air_quality",
+      aqi_value="Air Quality Index value.",
+      returns={"type": "string", "description": "Description of the air quality."},
+      note="AQI ranges and descriptions are based on US standards.")
 def describe_us_aqi(aqi_value):
-    if 0 <= aqi_value <= 50:
-        return "Good"
-    elif 51 <= aqi_value <= 100:
-        return "Moderate"
-    elif 101 <= aqi_value <= 150:
-        return "Unhealthy for Sensitive Groups"
-    elif 151 <= aqi_value <= 200:
-        return "Unhealthy"
-    elif 201 <= aqi_value <= 300:
-        return "Very Unhealthy"
-    elif 301 <= aqi_value <= 500:
-        return "Hazardous"
-    else:
-        return "Invalid AQI value"
+    return us_aqi_labels(aqi_value).item()
 
-def describe_current_air_quality_index(openmeteo, latitude, longitude, target_datetime):
+def _describe_current_air_quality_index_request(latitude, longitude, target_datetime):
     url = "https://air-quality-api.open-meteo.com/v1/air-quality"
     params = {
         "latitude": latitude,
         "longitude": longitude,
         "current": ["european_aqi", "us_aqi"],
         "timeformat": "unixtime",
-        "past_days": 92,
     }
-
+    return url, params
+
+def _describe_current_air_quality_index_output(responses, target_datetime):
+    for response in responses:
+        # Current values. The order of variables needs to be the same as requested.
+        current = response.Current()
+        if current is None:
+            continue
+
+        current_european_aqi = current.Variables(0).Value()
+        current_us_aqi = current.Variables(1).Value()
+        # Time of the current values, at the location
+        measured_at = datetime.fromtimestamp(current.Time() + response.UtcOffsetSeconds(), timezone.utc)
+        formatted_datetime = measured_at.strftime("%Y-%m-%d at %H:%M")
+        print(f"Formatted Time {formatted_datetime}")
+
+        european_rated = describe_european_aqi(current_european_aqi)
+        print(f"Current european_aqi is {current_european_aqi} and it is rated as {european_rated}")
+        us_rated = describe_us_aqi(current_us_aqi)
+        print(f"Current us_aqi is {current_us_aqi} and it is rated as {us_rated}")
+
+        json_output = {
+            "Date and Time": formatted_datetime,
+            "European AQI": f"{round(float(current_european_aqi), 4)} and it is rated as {european_rated}",
+            "US AQI": f"{round(float(current_us_aqi), 4)} and it is rated as {us_rated}",
+        }
+        return json_output
+
+    print("No valid data found in the response.")
+    return None
+
+@tool("Describes the current air quality index for a specific location and target datetime.",
+      family="air_quality",
+      returns={"type": "object", "description": "Dictionary containing descriptions of European and US AQI. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Date and Time": {"type": "string", "description": "Formatted date and time of the air quality data."},
+                   "European AQI": {"type": "string", "description": "Description and rating of the European AQI."},
+                   "US AQI": {"type": "string", "description": "Description and rating of the US AQI."}}},
+      note="Uses the Open-Meteo air quality API: https://air-quality-api.open-meteo.com/v1/air-quality.")
+def describe_current_air_quality_index(openmeteo, latitude, longitude, target_datetime):
     try:
-        # Assuming openmeteo.weather_api returns a list of responses
+        url, params = _describe_current_air_quality_index_request(latitude, longitude, target_datetime)
         responses = openmeteo.weather_api(url, params=params)
+        return _describe_current_air_quality_index_output(responses, target_datetime)
 
-        for response in responses:
-            # Current values. The order of variables needs to be the same as requested.
-            current = response.get("current", {})
-
-            current_european_aqi = current.get("european_aqi")
-            current_us_aqi = current.get("us_aqi")
-
-            if current_european_aqi is not None and current_us_aqi is not None:
-                current_aqi_data = {
-                    "date": pd.date_range(
-                        start=pd.to_datetime(response.get("time"), unit="s"),
-                        end=pd.to_datetime(response.get("timeEnd"), unit="s"),
-                        freq=pd.Timedelta(seconds=response.get("interval")),
-                        inclusive="left"
-                    )
-                }
-                current_aqi_data["current_european_aqi"] = current_european_aqi
-                current_aqi_data["current_us_aqi"] = current_us_aqi
-
-                current_aqi_dataframe = pd.DataFrame(data=current_aqi_data)
-
-                # Filter the DataFrame for the target datetime
-                target_datetime = pd.to_datetime(target_datetime)
-                target_data = current_aqi_dataframe[current_aqi_dataframe['date'] == target_datetime]
-
-                if not target_data.empty:
-                    formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
-
-                    print(f"Formatted Time {formatted_datetime}")
-                    current_european_aqi = target_data['current_european_aqi'].values[0]
-                    european_rated = describe_european_aqi(current_european_aqi)
-                    print(f"Current european_aqi is {current_european_aqi} and it is rated as {european_rated}")
-
-                    current_us_aqi = target_data['current_us_aqi'].values[0]
-                    us_rated = describe_us_aqi(current_us_aqi)
-                    print(f"Current us_aqi is {current_us_aqi} and it is rated as {us_rated}")
-
-                    json_output = {
-                        "Date and Time": formatted_datetime,
-                        "European AQI": f"{round(float(current_european_aqi), 4)} and it is rated as {european_rated}",
-                        "US AQI": f"{round(float(current_us_aqi), 4)} and it is rated as {us_rated}",
-                    }
-                    return json_output
-                else:
-                    formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
-                    print(f"No data available for {formatted_datetime}")
-                    return None
-
-        print("No valid data found in the response.")
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
         return None
-
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
         return None
@@ -430,7 +414,7 @@ def describe_current_air_quality_index(openmeteo, latitude, longitude, target_da
         print(f"Exception: {e}")
         return None
 
-def daily_marine_data(openmeteo, latitude, longitude, target_datetime):
+def _daily_marine_data_request(latitude, longitude, target_datetime):
     url = "https://marine-api.open-meteo.com/v1/marine"
     params = {
         "latitude": latitude,
@@ -438,47 +422,42 @@ def daily_marine_data(openmeteo, latitude, longitude, target_datetime):
         "daily": "wave_height_max",
         "timeformat": "unixtime",
         "timezone": "auto",
-        "past_days": 92,
-
+        **plan_days(url, target_datetime),
     }
+    return url, params
+
+def _daily_marine_data_output(series, target_datetime):
+    target_datetime = parse_when(target_datetime)
+    wave_height_max = series.value("wave_height_max", target_datetime.date())
 
+    if wave_height_max is not None:
+        formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
+        json_output = {
+                        "Date and Time": formatted_datetime,
+                        "Max Wave Height": {round(wave_height_max, 4)}
+                    }
+        return json_output
+    else:
+        formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"No data available for {formatted_datetime}")
+        return None
+
+@tool("Retrieves daily marine data for a specific location and target datetime.",
+      family="marine",
+      returns={"type": "object", "description": "Dictionary containing daily marine data. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Date and Time": {"type": "string", "description": "Formatted date and time of the marine data."},
+                   "Max Wave Height": {"type": "number", "description": "Maximum wave height for the specified date."}}},
+      note="Uses the Open-Meteo marine API: https://marine-api.open-meteo.com/v1/marine.")
+def daily_marine_data(openmeteo, latitude, longitude, target_datetime):
     try:
-        responses = openmeteo.weather_api(url, params=params)
-        response = responses[0]
-
-        # Process daily data
-        daily = response.Daily()
-        daily_wave_height_max = daily.Variables(0).ValuesAsNumpy()
-
-        daily_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(daily.Time(), unit="s"),
-                end=pd.to_datetime(daily.TimeEnd(), unit="s"),
-                freq=pd.Timedelta(seconds=daily.Interval()),
-                inclusive="left"
-            ),
-            "daily_wave_height_max": [value for value in daily_wave_height_max]
-        }
-        
-        daily_dataframe = pd.DataFrame(data=daily_data)
-        #print(daily_dataframe)
-        
-        target_datetime = pd.to_datetime(target_datetime)
-        target_data = daily_dataframe[daily_dataframe['date'].dt.date == target_datetime.date()]
-        
-        if not target_data.empty:
-            formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
-            #print(f"Max Wave Height: {round(float(target_data['daily_wave_height_max'].values[0]), 4)}")
-            json_output = {
-                            "Date and Time": formatted_datetime,
-                            "Max Wave Height": {round(float(target_data['daily_wave_height_max'].values[0]), 4)}
-                        }
-            return json_output
-        else:
-            formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
-            print(f"No data available for {formatted_datetime}")
-            return None
+        url, params = _daily_marine_data_request(latitude, longitude, target_datetime)
+        series = fetch_series(openmeteo, url, params, "daily", target_datetime)
+        return _daily_marine_data_output(series, target_datetime)
 
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
         return None
@@ -486,7 +465,7 @@ def daily_marine_data(openmeteo, latitude, longitude, target_datetime):
         print(f"Exception: {e}")
         return None
 
-def hourly_marine_data(openmeteo, latitude, longitude, target_datetime):
+def _hourly_marine_data_request(latitude, longitude, target_datetime):
     url = "https://marine-api.open-meteo.com/v1/marine"
     params = {
         "latitude": latitude,
@@ -494,58 +473,50 @@ def hourly_marine_data(openmeteo, latitude, longitude, target_datetime):
         "hourly": ["wave_height", "wave_direction","wave_period"],
         "timeformat": "unixtime",
         "timezone": "auto",
-        "past_days": 92,
+        **plan_days(url, target_datetime),
     }
+    return url, params
 
-    try:
-        responses = openmeteo.weather_api(url, params=params)
-        response = responses[0]
-
-        # Process hourly data
-        hourly = response.Hourly()
-        hourly_wave_height = hourly.Variables(0).ValuesAsNumpy()
-        hourly_wave_direction = hourly.Variables(1).ValuesAsNumpy()
-        current_wave_period = hourly.Variables(2).ValuesAsNumpy()
-
-        hourly_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(hourly.Time(), unit="s"),
-                end=pd.to_datetime(hourly.TimeEnd(), unit="s"),
-                freq=pd.Timedelta(seconds=hourly.Interval()),
-                inclusive="left"
-            ),
-            "hourly_wave_height": [value for value in hourly_wave_height],
-            "hourly_wave_direction": [value for value in hourly_wave_direction],
-            "hourly_wave_period": [value for value in current_wave_period]
-            }
+def _hourly_marine_data_output(series, target_datetime):
+    # Target hour (the first hour when only a date is given)
+    target_datetime = parse_when(target_datetime)
+    target_data = series.row(target_datetime)
 
-        #print("Hourly Data:", hourly_data)
-        
-        hourly_dataframe = pd.DataFrame(data=hourly_data)
-        #print(hourly_dataframe)
-        
-        target_datetime = pd.to_datetime(target_datetime)
-        target_data = hourly_dataframe[hourly_dataframe['date'].dt.date == target_datetime.date()]
-        
-        if not target_data.empty:
-            formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
-            # print(formatted_datetime)
-            # print(f"hourly_wave_height: {round(float(target_data['hourly_wave_height'].values[0]), 4)} meters")
-            # print(f"hourly_wave_direction: {round(float(target_data['hourly_wave_direction'].values[0]), 4)} degree"),
-            # print(f"hourly_wave_period: {round(float(target_data['hourly_wave_period'].values[0]), 4)} seconds"),
-            
-            json_output = {
-                            "Date and Time": formatted_datetime,
-                            "Wave Height": f"{round(float(target_data['hourly_wave_height'].values[0]), 4)} meters",
-                            "Wave Direction": f"{round(float(target_data['hourly_wave_direction'].values[0]), 4)} degree",
-                            "Wave Period": f"{round(float(target_data['hourly_wave_period'].values[0]), 4)} seconds"
-                        }
-            return json_output
-        else:
-            formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
-            print(f"No data available for {formatted_datetime}")
-            return None
+    if target_data is not None:
+        formatted_datetime = target_datetime.strftime("%Y-%m-%d at %H:%M")
+        json_output = {
+                        "Date and Time": formatted_datetime,
+                        "Wave Height": f"{round(target_data['wave_height'], 4)} meters",
+                        "Wave Direction": f"{round(target_data['wave_direction'], 4)} degree",
+                        "Wave Period": f"{round(target_data['wave_period'], 4)} seconds",
+                        "Daily Summary": _daily_summary(series, {"wave_height": "Wave Height (meters)",
+                                                                 "wave_period": "Wave Period (seconds)"}, target_datetime)
+                    }
+        return json_output
+    else:
+        formatted_datetime = target_datetime.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"No data available for {formatted_datetime}")
+        return None
+
+@tool("Retrieves hourly marine data for a specific location and target datetime.",
+      family="marine",
+      returns={"type": "object", "description": "Dictionary containing hourly marine data. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Date and Time": {"type": "string", "description": "Formatted date and time of the marine data."},
+                   "Wave Height": {"type": "number", "description": "Hourly wave height in meters."},
+                   "Wave Direction": {"type": "number", "description": "Hourly wave direction in degrees."},
+                   "Wave Period": {"type": "number", "description": "Hourly wave period in seconds."},
+                   "Daily Summary": {"type": "object", "description": "Min, max, mean and 90th percentile of wave height and period over the local day."}}},
+      note="Uses the Open-Meteo marine API: https://marine-api.open-meteo.com/v1/marine.")
+def hourly_marine_data(openmeteo, latitude, longitude, target_datetime):
+    try:
+        url, params = _hourly_marine_data_request(latitude, longitude, target_datetime)
+        series = fetch_series(openmeteo, url, params, "hourly", target_datetime)
+        return _hourly_marine_data_output(series, target_datetime)
 
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
         return None
@@ -553,63 +524,115 @@ def hourly_marine_data(openmeteo, latitude, longitude, target_datetime):
         print(f"Exception: {e}")
         return None
 
-def climate_change_data(openmeteo, latitude, longitude, target_year):
+def _climate_change_data_request(latitude, longitude, target_year):
     url = "https://climate-api.open-meteo.com/v1/climate"
+    # Reject years the model does not cover, then ask for the whole projection:
+    # it is reduced once into the per-year table that answers every later year
+    if target_year is not None:
+        plan_year(url, target_year)
+    first, last = valid_range(url)
     params = {
         "latitude": latitude,
         "longitude": longitude,
-        "start_date": "1950-01-01",
-        "end_date":  "2050-12-31",
+        "start_date": first.isoformat(),
+        "end_date": last.isoformat(),
         "models":  "MRI_AGCM3_2_S",
         "timeformat": "unixtime",
         "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
     }
+    return url, params
+
+def _climate_change_data_output(aggregates, target_year):
+    # Filter for the target year if provided, else average over every year of the projection
+    if target_year is None:
+        year_data = aggregates.years(aggregates.first_year, aggregates.last_year)
+        if year_data is None:
+            print("No data available")
+            return None
+        return {
+            "Year": f"{aggregates.first_year}-{aggregates.last_year}",
+            "Temperature Max": f"{round(year_data['temperature_2m_max'], 4)} °C",
+            "Temperature Min": f"{round(year_data['temperature_2m_min'], 4)} °C",
+            "Precipitation Sum": f"{round(year_data['precipitation_sum'], 4)} mm",
+        }
+    if target_year:
+        year_data = aggregates.year(target_year)
+        if year_data is not None:
+            json_output = {
+                "Year": target_year,
+                "Temperature Max": f"{round(year_data['temperature_2m_max'], 4)} °C",
+                "Temperature Min": f"{round(year_data['temperature_2m_min'], 4)} °C",
+                "Precipitation Sum": f"{round(year_data['precipitation_sum'], 4)} mm",
+            }
+            return json_output
+        else:
+            print(f"No data available for the year {target_year}")
+            return None
 
+@tool("Retrieves climate change data for a specific location and target year.",
+      family="climate",
+      target_year={"type": ["integer", "null"], "description": "Target year for data retrieval. If null, data for all years is considered."},
+      returns={"type": "object", "description": "Dictionary containing climate change data for the target year. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Year": {"type": ["integer", "string"], "description": "The target year for which the data is retrieved, or the span of years (e.g. \"1950-2050\") when no year is given."},
+                   "Temperature Max": {"type": "string", "description": "Mean daily maximum temperature in degrees Celsius."},
+                   "Temperature Min": {"type": "string", "description": "Mean daily minimum temperature in degrees Celsius."},
+                   "Precipitation Sum": {"type": "string", "description": "Sum of daily precipitation in millimeters."}}},
+      note="Uses the Open-Meteo climate API: https://climate-api.open-meteo.com/v1/climate.")
+def climate_change_data(openmeteo, latitude, longitude, target_year=None):
     try:
-        responses = openmeteo.weather_api(url, params=params)
-        response = responses[0]
-
-        # Process daily data
-        daily = response.Daily()
-        daily_temperature_2m_max = daily.Variables(0).ValuesAsNumpy()
-        daily_temperature_2m_min = daily.Variables(1).ValuesAsNumpy()
-        daily_precipitation_sum = daily.Variables(2).ValuesAsNumpy()
-
-        daily_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(daily.Time(), unit="s"),
-                end=pd.to_datetime(daily.TimeEnd(), unit="s"),
-                freq=pd.Timedelta(seconds=daily.Interval()),
-                inclusive="left"
-            ),
-            "temperature_2m_max": [value for value in daily_temperature_2m_max],
-            "temperature_2m_min": [value for value in daily_temperature_2m_min],
-            "precipitation_sum": [value for value in daily_precipitation_sum]
+        url, params = _climate_change_data_request(latitude, longitude, target_year)
+        aggregates = climate_aggregates(openmeteo, url, params)
+        return _climate_change_data_output(aggregates, target_year)
+
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
+    except KeyError as e:
+        print(f"Error: Key not found in the response - {e}")
+        return None
+    except Exception as e:
+        print(f"Exception: {e}")
+        return None
+
+def _climate_anomaly_data_output(aggregates, target_year, baseline_start=1961, baseline_end=1990):
+    anomaly = aggregates.anomaly(target_year, (int(baseline_start), int(baseline_end)))
+    if anomaly is not None:
+        json_output = {
+            "Year": target_year,
+            "Baseline": f"{baseline_start}-{baseline_end}",
+            "Temperature Max Anomaly": f"{round(anomaly['temperature_2m_max'], 4)} °C",
+            "Temperature Min Anomaly": f"{round(anomaly['temperature_2m_min'], 4)} °C",
+            "Precipitation Sum Anomaly": f"{round(anomaly['precipitation_sum'], 4)} mm",
         }
+        return json_output
+    else:
+        print(f"No data available for the year {target_year} or the baseline {baseline_start}-{baseline_end}")
+        return None
 
-        daily_dataframe = pd.DataFrame(data=daily_data)
-        # print(daily_dataframe)
-
-        daily_dataframe['year'] = daily_dataframe['date'].dt.year
-        filtered_data = daily_dataframe[daily_dataframe['year'] == target_year]
-        # Drop the 'year' column if it's no longer needed
-        filtered_data = filtered_data.drop(columns=['year'])
-        # Filter for the target year if provided
-        if target_year:
-            filtered_data = daily_dataframe[daily_dataframe['date'].dt.year == target_year]
-            if not filtered_data.empty:
-                json_output = {
-                    "Year": target_year,
-                    "Temperature Max": f"{round(float(filtered_data['temperature_2m_max'].mean()), 4)} °C",
-                    "Temperature Min": f"{round(float(filtered_data['temperature_2m_min'].mean()), 4)} °C",
-                    "Precipitation Sum": f"{round(float(filtered_data['precipitation_sum'].sum()), 4)} mm",
-                }
-                return json_output
-            else:
-                print(f"No data available for the year {target_year}")
-                return None
-        
+@tool("Retrieves how a target year's projected climate differs from a baseline period for a specific location.",
+      family="climate",
+      target_year={"type": "integer", "description": "Year to compare against the baseline."},
+      baseline_start={"type": "integer", "description": "First year of the baseline period. Defaults to 1961."},
+      baseline_end={"type": "integer", "description": "Last year of the baseline period. Defaults to 1990."},
+      returns={"type": "object", "description": "Dictionary containing the differences between the target year and the baseline mean. Returns None if data is not available or an error occurs.",
+               "properties": {
+                   "Year": {"type": "integer", "description": "The target year."},
+                   "Baseline": {"type": "string", "description": "The baseline period."},
+                   "Temperature Max Anomaly": {"type": "string", "description": "Difference in mean daily maximum temperature in degrees Celsius."},
+                   "Temperature Min Anomaly": {"type": "string", "description": "Difference in mean daily minimum temperature in degrees Celsius."},
+                   "Precipitation Sum Anomaly": {"type": "string", "description": "Difference in yearly precipitation total in millimeters."}}},
+      note="Uses the Open-Meteo climate API: https://climate-api.open-meteo.com/v1/climate.")
+def climate_anomaly_data(openmeteo, latitude, longitude, target_year, baseline_start=1961, baseline_end=1990):
+    # Answered from the same per-year table as climate_change_data, no extra request
+    try:
+        url, params = _climate_change_data_request(latitude, longitude, target_year)
+        aggregates = climate_aggregates(openmeteo, url, params)
+        return _climate_anomaly_data_output(aggregates, target_year, baseline_start, baseline_end)
 
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
         return None
@@ -617,7 +640,7 @@ def climate_change_data(openmeteo, latitude, longitude, target_year):
         print(f"Exception: {e}")
         return None
 
-def describe_current_weather(openmeteo, latitude, longitude):
+def _describe_current_weather_request(latitude, longitude):
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
         "latitude": latitude,
@@ -625,85 +648,125 @@ def describe_current_weather(openmeteo, latitude, longitude):
         "current": ["temperature_2m", "relative_humidity_2m", "is_day", "precipitation", "rain", "showers", "snowfall", "weather_code", "cloud_cover", "surface_pressure", "wind_speed_10m", "wind_direction_10m", "wind_gusts_10m"],
         "timeformat": "unixtime"
     }
+    return url, params
+
+def _describe_current_weather_output(responses):
+    for response in responses:
+        current = response.Current()
+        current_weather_code = current.Variables(7).Value()
+        weather_description = get_weather_description(current_weather_code, city_location="Berlin")
+
+        current_date = datetime.now().date()
+        current_time = datetime.now().time()
+        formatted_date = current_date.strftime("%d-%m-%Y")
+        formatted_time = current_time.strftime("%H:%M:%S")
+
+        weather_data = {
+            "date": formatted_date,
+            "time": formatted_time,
+            "day_or_night": "Day" if current.Variables(2).Value() else "Night",
+            "coordinates": {
+                "latitude": round(response.Latitude(), 4),
+                "longitude": round(response.Longitude(), 4),
+            },
+            "elevation": {
+                "value": round(response.Elevation(), 4),
+                "unit": "meters"
+            },
+            "temperature_2m": {
+                "value": round(current.Variables(0).Value(), 4),
+                "unit": "°C"
+            },
+            "relative_humidity_2m": {
+                "value": round(current.Variables(1).Value(), 4),
+                "unit": "%"
+            },
+            "precipitation": {
+                "value": round(current.Variables(3).Value(), 4),
+                "unit": "mm"
+            },
+            "rain": {
+                "value": round(current.Variables(4).Value(), 4),
+                "unit": "mm"
+            },
+            "showers": {
+                "value": round(current.Variables(5).Value(), 4),
+                "unit": "mm"
+            },
+            "snowfall": {
+                "value": round(current.Variables(6).Value(), 4),
+                "unit": "mm"
+            },
+            "weather_code": current_weather_code,
+            "weather_description": weather_description,
+            "cloud_cover": {
+                "value": round(current.Variables(8).Value(), 4),
+                "unit": "%"
+            },
+            "surface_pressure": {
+                "value": round(current.Variables(9).Value(), 4),
+                "unit": "hPa"
+            },
+            "wind_speed_10m": {
+                "value": round(current.Variables(10).Value(), 4),
+                "unit": "m/s"
+            },
+            "wind_direction_10m": {
+                "value": round(current.Variables(11).Value(), 4),
+                "unit": "degrees"
+            },
+            "wind_gusts_10m": {
+                "value": round(current.Variables(12).Value(), 4),
+                "unit": "m/s"
+            },
+        }
 
+        print(json.dumps(weather_data, indent=2))
+        return weather_data
+
+    print("No data available")
+    return None
+
+# Result schema of describe_current_weather: measured values carry their unit
+def _measured(label, value, unit):
+    return {"type": "object", "description": f"{label} data.", "properties": {
+        "value": {"type": "string", "description": value},
+        "unit": {"type": "string", "description": f"{label} unit (e.g., '{unit}')."}}}
+
+_CURRENT_WEATHER_RETURNS = {
+    "date": {"type": "string", "description": "Current date in the format 'YYYY-MM-DD'."},
+    "time": {"type": "string", "description": "Current time in the format 'HH:MM:SS'."},
+    "day_or_night": {"type": "string", "description": "Indicates whether it is day or night."},
+    "coordinates": {"type": "object", "description": "Geographical coordinates of the location.", "properties": {
+        "latitude": {"type": "number", "description": "Latitude of the location (rounded to 4 decimal places)."},
+        "longitude": {"type": "number", "description": "Longitude of the location (rounded to 4 decimal places)."}}},
+    "elevation": {"type": "object", "description": "Elevation data.", "properties": {
+        "value": {"type": "number", "description": "Elevation value (rounded to 4 decimal places)."},
+        "unit": {"type": "string", "description": "Unit of elevation (e.g., 'meters')."}}},
+    "temperature_2m": _measured("Temperature", "Current temperature at 2 meters above ground.", "°C"),
+    "relative_humidity_2m": _measured("Relative humidity", "Current relative humidity at 2 meters above ground.", "%"),
+    "precipitation": _measured("Precipitation", "Current precipitation.", "mm"),
+    "rain": _measured("Rain", "Current rain.", "mm"),
+    "showers": _measured("Showers", "Current showers.", "mm"),
+    "snowfall": _measured("Snowfall", "Current snowfall.", "mm"),
+    "weather_code": {"type": "string", "description": "Current weather code."},
+    "weather_description": {"type": "string", "description": "Description of the current weather."},
+    "cloud_cover": _measured("Cloud cover", "Current cloud cover.", "%"),
+    "surface_pressure": _measured("Surface pressure", "Current surface pressure.", "hPa"),
+    "wind_speed_10m": _measured("Wind speed", "Current wind speed at 10 meters above ground.", "m/s"),
+    "wind_direction_10m": _measured("Wind direction", "Current wind direction at 10 meters above ground.", "degrees"),
+    "wind_gusts_10m": _measured("Wind gusts", "Current wind gusts at 10 meters above ground.", "m/s"),
+}
+
+@tool("Retrieves the current weather data for a specific location.",
+      family="weather",
+      returns={"type": "object", "description": "Dictionary containing current weather data. Returns None if data is not available or an error occurs.",
+               "properties": _CURRENT_WEATHER_RETURNS})
+def describe_current_weather(openmeteo, latitude, longitude):
     try:
+        url, params = _describe_current_weather_request(latitude, longitude)
         responses = openmeteo.weather_api(url, params=params)
-
-        for response in responses:
-            current = response.Current()
-            current_weather_code = current.Variables(7).Value()
-            weather_description = get_weather_description(current_weather_code, city_location="Berlin")
-
-            current_date = datetime.now().date()
-            current_time = datetime.now().time()
-            formatted_date = current_date.strftime("%d-%m-%Y")
-            formatted_time = current_time.strftime("%H:%M:%S")
-
-            weather_data = {
-                "date": formatted_date,
-                "time": formatted_time,
-                "day_or_night": "Day" if current.Variables(2).Value() else "Night",
-                "coordinates": {
-                    "latitude": round(response.Latitude(), 4),
-                    "longitude": round(response.Longitude(), 4),
-                },
-                "elevation": {
-                    "value": round(response.Elevation(), 4),
-                    "unit": "meters"
-                },
-                "temperature_2m": {
-                    "value": round(current.Variables(0).Value(), 4),
-                    "unit": "°C"
-                },
-                "relative_humidity_2m": {
-                    "value": round(current.Variables(1).Value(), 4),
-                    "unit": "%"
-                },
-                "precipitation": {
-                    "value": round(current.Variables(3).Value(), 4),
-                    "unit": "mm"
-                },
-                "rain": {
-                    "value": round(current.Variables(4).Value(), 4),
-                    "unit": "mm"
-                },
-                "showers": {
-                    "value": round(current.Variables(5).Value(), 4),
-                    "unit": "mm"
-                },
-                "snowfall": {
-                    "value": round(current.Variables(6).Value(), 4),
-                    "unit": "mm"
-                },
-                "weather_code": current_weather_code,
-                "weather_description": weather_description,
-                "cloud_cover": {
-                    "value": round(current.Variables(8).Value(), 4),
-                    "unit": "%"
-                },
-                "surface_pressure": {
-                    "value": round(current.Variables(9).Value(), 4),
-                    "unit": "hPa"
-                },
-                "wind_speed_10m": {
-                    "value": round(current.Variables(10).Value(), 4),
-                    "unit": "m/s"
-                },
-                "wind_direction_10m": {
-                    "value": round(current.Variables(11).Value(), 4),
-                    "unit": "degrees"
-                },
-                "wind_gusts_10m": {
-                    "value": round(current.Variables(12).Value(), 4),
-                    "unit": "m/s"
-                },
-            }
-
-            print(json.dumps(weather_data, indent=2))
-            return weather_data
-
-        print("No data available")
-        return None
+        return _describe_current_weather_output(responses)
 
     except KeyError as e:
         print(f"Error: Key not found in the response - {e}")
@@ -712,12 +775,7 @@ def describe_current_weather(openmeteo, latitude, longitude):
         print(f"Exception: {e}")
         return None
 
-def get_today_weather_data(latitude, longitude, target_date):
-    # Setup the Open-Meteo API client with cache and retry on error
-    cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
-
+def _get_today_weather_data_request(latitude, longitude, target_date, end_date=None):
     # Make sure all required weather variables are listed here
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
@@ -730,124 +788,132 @@ def get_today_weather_data(latitude, longitude, target_date):
                   "shortwave_radiation_sum", "et0_fao_evapotranspiration"],
         "timeformat": "unixtime",
         "timezone": "auto",
-	    "past_days": 92
+        **plan_days(url, target_date, end_date),
     }
-    responses = openmeteo.weather_api(url, params=params)
-    response = responses[0]
-    # Process daily data. The order of variables needs to be the same as requested.
-    
-    # Process daily data. The order of variables needs to be the same as requested.
-    daily = response.Daily()
-    daily_weather_code = daily.Variables(0).ValuesAsNumpy()
-    daily_temperature_2m_max = daily.Variables(1).ValuesAsNumpy()
-    daily_temperature_2m_min = daily.Variables(2).ValuesAsNumpy()
-    daily_sunrise = daily.Variables(3).ValuesAsNumpy()
-    daily_sunset = daily.Variables(2).ValuesAsNumpy()
-    daily_daylight_duration = daily.Variables(5).ValuesAsNumpy()
-    daily_sunshine_duration = daily.Variables(6).ValuesAsNumpy()
-    daily_uv_index_max = daily.Variables(7).ValuesAsNumpy()
-    daily_uv_index_clear_sky_max = daily.Variables(8).ValuesAsNumpy()
-    daily_precipitation_sum = daily.Variables(9).ValuesAsNumpy()
-    daily_rain_sum = daily.Variables(10).ValuesAsNumpy()
-    daily_showers_sum = daily.Variables(11).ValuesAsNumpy()
-    daily_snowfall_sum = daily.Variables(12).ValuesAsNumpy()
-    daily_precipitation_hours = daily.Variables(13).ValuesAsNumpy()
-    daily_precipitation_probability_max = daily.Variables(12).ValuesAsNumpy()
-    daily_wind_speed_10m_max = daily.Variables(15).ValuesAsNumpy()
-    daily_wind_gusts_10m_max = daily.Variables(16).ValuesAsNumpy()
-    daily_wind_direction_10m_dominant = daily.Variables(17).ValuesAsNumpy()
-    daily_shortwave_radiation_sum = daily.Variables(18).ValuesAsNumpy()
-    daily_et0_fao_evapotranspiration = daily.Variables(19).ValuesAsNumpy()
-
-    daily_data = {"date": pd.date_range(
-        start = pd.to_datetime(daily.Time(), unit = "s"),
-        end = pd.to_datetime(daily.TimeEnd(), unit = "s"),
-        freq = pd.Timedelta(seconds = daily.Interval()),
-        inclusive = "left"
-    )}
-    daily_data["weather_code"] = np.round(daily_weather_code[0], 2)
-    daily_data["temperature_2m_max"] = np.round(daily_temperature_2m_max, 2)
-    daily_data["temperature_2m_min"] = np.round(daily_temperature_2m_min, 2)
-    daily_data["sunrise"] = np.round(daily_sunrise, 2)
-    daily_data["sunset"] = np.round(daily_sunset, 2)
-    daily_data["daylight_duration"] = np.round(daily_daylight_duration, 2)
-    daily_data["sunshine_duration"] = np.round(daily_sunshine_duration, 2)
-    daily_data["uv_index_max"] = np.round(daily_uv_index_max, 2)
-    daily_data["uv_index_clear_sky_max"] = np.round(daily_uv_index_clear_sky_max, 2)
-    daily_data["precipitation_sum"] = np.round(daily_precipitation_sum, 2)
-    daily_data["rain_sum"] = np.round(daily_rain_sum, 2)
-    daily_data["showers_sum"] = np.round(daily_showers_sum, 2)
-    daily_data["snowfall_sum"] = np.round(daily_snowfall_sum, 2)
-    daily_data["precipitation_hours"] = np.round(daily_precipitation_hours, 2)
-    daily_data["precipitation_probability_max"] = np.round(daily_precipitation_probability_max, 2)
-    daily_data["wind_speed_10m_max"] = np.round(daily_wind_speed_10m_max, 2)
-    daily_data["wind_gusts_10m_max"] = np.round(daily_wind_gusts_10m_max, 2)
-    daily_data["wind_direction_10m_dominant"] = np.round(daily_wind_direction_10m_dominant, 2)
-    daily_data["shortwave_radiation_sum"] = np.round(daily_shortwave_radiation_sum, 2)
-    daily_data["et0_fao_evapotranspiration"] = np.round(daily_et0_fao_evapotranspiration, 2)
-
-    daily_dataframe = pd.DataFrame(data = daily_data)
-    #print(daily_dataframe)
-    target_date_data = daily_dataframe[daily_dataframe['date'] == target_date]
-    target_date_data = target_date_data.apply(lambda x: x.astype(float) if x.name != 'date' else x)
-
-    # Weather data for the target date
-    # print(target_date_data)
-    # Convert seconds to hours for Daylight Duration and Sunshine Duration
+    return url, params
+
+# Range mode columns: label with unit, daily variable, divisor
+_DAILY_WEATHER_COLUMNS = (
+    ("Max Temperature (°C)", "temperature_2m_max", 1),
+    ("Min Temperature (°C)", "temperature_2m_min", 1),
+    ("Daylight Duration (hours)", "daylight_duration", 3600),
+    ("Sunshine Duration (hours)", "sunshine_duration", 3600),
+    ("UV Index Max", "uv_index_max", 1),
+    ("UV Index Clear Sky Max", "uv_index_clear_sky_max", 1),
+    ("Precipitation Sum (mm)", "precipitation_sum", 1),
+    ("Rain Sum (mm)", "rain_sum", 1),
+    ("Showers Sum (mm)", "showers_sum", 1),
+    ("Snowfall Sum (mm)", "snowfall_sum", 1),
+    ("Precipitation Hours (hours)", "precipitation_hours", 1),
+    ("Precipitation Probability Max (%)", "precipitation_probability_max", 1),
+    ("Wind Speed 10m Max (m/s)", "wind_speed_10m_max", 1),
+    ("Wind Gusts 10m Max (m/s)", "wind_gusts_10m_max", 1),
+    ("Wind Direction 10m Dominant (degrees)", "wind_direction_10m_dominant", 1),
+    ("Shortwave Radiation Sum (J/m^2)", "shortwave_radiation_sum", 1),
+    ("ET0 FAO Evapotranspiration (mm)", "et0_fao_evapotranspiration", 1),
+)
+
+def _get_today_weather_data_range_output(series, target_date, end_date):
+    # Every day of the range as one list per variable, straight from the decoded arrays
+    first_day, last_day = parse_when(target_date).date(), parse_when(end_date).date()
+    view = series.between(first_day, last_day + timedelta(days=1))
+    if not len(view):
+        print(f"No data available for {first_day} to {last_day}")
+        return None
+    columns = {"Weather Code": weather_code_descriptions(view["weather_code"].round()).tolist()}
+    for label, name, divisor in _DAILY_WEATHER_COLUMNS:
+        # NaN (no data) becomes null
+        columns[label] = [None if value != value else round(value, 2) for value in (view[name] / divisor).tolist()]
+    # A JSON string like the single-day output
+    return json.dumps({
+        "Dates": [datetime.fromtimestamp(int(t), timezone.utc).date().isoformat() for t in view.times()],
+        **columns,
+    }, indent=2)
+
+def _get_today_weather_data_output(series, target_date):
+    # Row for the target date by offset from the start of the cached series
+    target_date = parse_when(target_date)
+    target_date_data = series.row(target_date)
+    if target_date_data is None:
+        print(f"No data available for {target_date.strftime('%d-%m-%Y')}")
+        return None
+
     # Convert seconds to hours for Daylight Duration and Sunshine Duration
-    daylight_duration_hours = float(target_date_data["daylight_duration"].values[0]) / 3600
-    sunshine_duration_hours = float(target_date_data["sunshine_duration"].values[0]) / 3600
-    target_date = pd.to_datetime(target_date)
-
-    # Print statements for each variable with unit names
-    # print("\nWeather data for the target date:", target_date.date())
-    # print("Weather Code:", get_weather_description(target_date_data["weather_code"].values[0]))
-    # print("Max Temperature:", target_date_data["temperature_2m_max"].values[0], "°C")
-    # print("Min Temperature:", target_date_data["temperature_2m_min"].values[0], "°C")
-    # print("Daylight Duration:", round(daylight_duration_hours, 2), "hours")
-    # print("Sunshine Duration:", round(sunshine_duration_hours, 2), "hours")
-    # print("UV Index Max:", target_date_data["uv_index_max"].values[0], " (UV Index)")
-    # print("UV Index Clear Sky Max:", target_date_data["uv_index_clear_sky_max"].values[0], " (UV Index)")
-    # print("Precipitation Sum:", target_date_data["precipitation_sum"].values[0], "mm")
-    # print("Rain Sum:", target_date_data["rain_sum"].values[0], "mm")
-    # print("Showers Sum:", target_date_data["showers_sum"].values[0], "mm")
-    # print("Snowfall Sum:", target_date_data["snowfall_sum"].values[0], "mm")
-    # print("Precipitation Hours:", target_date_data["precipitation_hours"].values[0], "hours")
-    # print("Precipitation Probability Max:", target_date_data["precipitation_probability_max"].values[0], "%")
-    # print("Wind Speed 10m Max:", target_date_data["wind_speed_10m_max"].values[0], "m/s")
-    # print("Wind Gusts 10m Max:", target_date_data["wind_gusts_10m_max"].values[0], "m/s")
-    # print("Wind Direction 10m Dominant:", target_date_data["wind_direction_10m_dominant"].values[0], "degrees")
-    # print("Shortwave Radiation Sum:", target_date_data["shortwave_radiation_sum"].values[0], "J/m^2")
-    # print("ET0 FAO Evapotranspiration:", target_date_data["et0_fao_evapotranspiration"].values[0], "mm")
+    daylight_duration_hours = target_date_data["daylight_duration"] / 3600
+    sunshine_duration_hours = target_date_data["sunshine_duration"] / 3600
 
     json_output = {
         "Weather data for the target date": str(target_date.date()),
-        "Weather Code": get_weather_description(target_date_data["weather_code"].values[0]),
-        "Max Temperature": f"{float(target_date_data['temperature_2m_max'].values[0]):.2f} °C",
-        "Min Temperature": f"{float(target_date_data['temperature_2m_min'].values[0]):.2f} °C",
+        "Weather Code": get_weather_description(round(target_date_data["weather_code"])),
+        "Max Temperature": f"{target_date_data['temperature_2m_max']:.2f} °C",
+        "Min Temperature": f"{target_date_data['temperature_2m_min']:.2f} °C",
         "Daylight Duration": f"{daylight_duration_hours:.2f} hours",
         "Sunshine Duration": f"{sunshine_duration_hours:.2f} hours",
-        "UV Index Max": f"{float(target_date_data['uv_index_max'].values[0]):.2f}  (UV Index)",
-        "UV Index Clear Sky Max": f"{float(target_date_data['uv_index_clear_sky_max'].values[0]):.2f}  (UV Index)",
-        "Precipitation Sum": f"{float(target_date_data['precipitation_sum'].values[0]):.2f} mm",
-        "Rain Sum": f"{float(target_date_data['rain_sum'].values[0]):.2f} mm",
-        "Showers Sum": f"{float(target_date_data['showers_sum'].values[0]):.2f} mm",
-        "Snowfall Sum": f"{float(target_date_data['snowfall_sum'].values[0]):.2f} mm",
-        "Precipitation Hours": f"{float(target_date_data['precipitation_hours'].values[0]):.2f} hours",
-        "Precipitation Probability Max": f"{float(target_date_data['precipitation_probability_max'].values[0]):.2f} %",
-        "Wind Speed 10m Max": f"{float(target_date_data['wind_speed_10m_max'].values[0]):.2f} m/s",
-        "Wind Gusts 10m Max": f"{float(target_date_data['wind_gusts_10m_max'].values[0]):.2f} m/s",
-        "Wind Direction 10m Dominant": f"{float(target_date_data['wind_direction_10m_dominant'].values[0]):.2f} degrees",
-        "Shortwave Radiation Sum": f"{float(target_date_data['shortwave_radiation_sum'].values[0]):.2f} J/m^2",
-        "ET0 FAO Evapotranspiration": f"{float(target_date_data['et0_fao_evapotranspiration'].values[0]):.2f} mm"
+        "UV Index Max": f"{target_date_data['uv_index_max']:.2f}  (UV Index)",
+        "UV Index Clear Sky Max": f"{target_date_data['uv_index_clear_sky_max']:.2f}  (UV Index)",
+        "Precipitation Sum": f"{target_date_data['precipitation_sum']:.2f} mm",
+        "Rain Sum": f"{target_date_data['rain_sum']:.2f} mm",
+        "Showers Sum": f"{target_date_data['showers_sum']:.2f} mm",
+        "Snowfall Sum": f"{target_date_data['snowfall_sum']:.2f} mm",
+        "Precipitation Hours": f"{target_date_data['precipitation_hours']:.2f} hours",
+        "Precipitation Probability Max": f"{target_date_data['precipitation_probability_max']:.2f} %",
+        "Wind Speed 10m Max": f"{target_date_data['wind_speed_10m_max']:.2f} m/s",
+        "Wind Gusts 10m Max": f"{target_date_data['wind_gusts_10m_max']:.2f} m/s",
+        "Wind Direction 10m Dominant": f"{target_date_data['wind_direction_10m_dominant']:.2f} degrees",
+        "Shortwave Radiation Sum": f"{target_date_data['shortwave_radiation_sum']:.2f} J/m^2",
+        "ET0 FAO Evapotranspiration": f"{target_date_data['et0_fao_evapotranspiration']:.2f} mm"
     }
 
-
     # Convert the dictionary to a JSON-formatted string
     json_output_str = json.dumps(json_output, indent=2)
 
-    # Print the JSON-formatted string
-    #print(json_output_str)
-
     # Return the JSON-formatted string if needed
     return json_output_str
+
+@tool("Retrieves daily weather data for a specific location and target date, or for every day of a date range.",
+      family="weather",
+      target_date="Target date in the format 'YYYY-MM-DD', or the first date of the range.",
+      end_date="Last date of the range in the format 'YYYY-MM-DD'. Optional; use it instead of one call per day.",
+      returns={"description": "JSON-formatted dictionary: the target date's weather data, or with end_date one list per variable over the range. Returns None if data is not available or an error occurs.",
+               "oneOf": [
+                   {"type": "object", "description": "Daily weather data for the target date.",
+                    "properties": {key: {"type": "string", "description": description} for key, description in (
+                        ("Weather data for the target date", "Formatted date of the weather data."),
+                        ("Weather Code", "Description of the weather code."),
+                        ("Max Temperature", "Mean daily maximum temperature in degrees Celsius."),
+                        ("Min Temperature", "Mean daily minimum temperature in degrees Celsius."),
+                        ("Daylight Duration", "Duration of daylight in hours."),
+                        ("Sunshine Duration", "Duration of sunshine in hours."),
+                        ("UV Index Max", "Maximum UV index."),
+                        ("UV Index Clear Sky Max", "Maximum UV index under clear sky."),
+                        ("Precipitation Sum", "Sum of daily precipitation in millimeters."),
+                        ("Rain Sum", "Sum of daily rain in millimeters."),
+                        ("Showers Sum", "Sum of daily showers in millimeters."),
+                        ("Snowfall Sum", "Sum of daily snowfall in millimeters."),
+                        ("Precipitation Hours", "Duration of precipitation in hours."),
+                        ("Precipitation Probability Max", "Maximum precipitation probability."),
+                        ("Wind Speed 10m Max", "Maximum wind speed at 10 meters above ground."),
+                        ("Wind Gusts 10m Max", "Maximum wind gusts at 10 meters above ground."),
+                        ("Wind Direction 10m Dominant", "Dominant wind direction at 10 meters above ground."),
+                        ("Shortwave Radiation Sum", "Sum of shortwave radiation in J/m^2."),
+                        ("ET0 FAO Evapotranspiration", "Evapotranspiration according to FAO in millimeters."))}},
+                   {"type": "object", "description": "Daily weather data for every day from target_date to end_date, one entry per day.",
+                    "properties": {
+                        "Dates": {"type": "array", "items": {"type": "string"}, "description": "Dates in the format 'YYYY-MM-DD'."},
+                        "Weather Code": {"type": "array", "items": {"type": "string"}, "description": "Description of the weather code."},
+                        **{label: {"type": "array", "items": {"type": ["number", "null"]}, "description": f"Daily {name}; null where not available."}
+                           for label, name, _ in _DAILY_WEATHER_COLUMNS}}}]},
+      note="Uses the Open-Meteo weather API: https://api.open-meteo.com/v1/forecast.")
+def get_today_weather_data(latitude, longitude, target_date, openmeteo=None, end_date=None):
+    # Reuse the shared pooled client instead of reopening the cache per call
+    openmeteo = openmeteo or get_openmeteo_client()
+    try:
+        url, params = _get_today_weather_data_request(latitude, longitude, target_date, end_date)
+    except DateOutOfRange as e:
+        print(f"No data available: {e}")
+        return None
+    # One request and one decode for the whole range
+    series = fetch_series(openmeteo, url, params, "daily", target_date, until=end_date)
+    if end_date is not None:
+        return _get_today_weather_data_range_output(series, target_date, end_date)
+    return _get_today_weather_data_output(series, target_date)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+# Optional offline gazetteer for city lookups. Cities are kept in one sorted,
+# fixed-width NumPy record array saved as .npy and memory-mapped on load, so
+# exact and prefix lookups are a binary search with no network round-trip.
+# Only exact (or alias) names with a single entry answer before the API, so
+# namesakes are left to its ranking; a fuzzy match is a fallback for when the
+# API cannot be reached.
+
+import csv
+import difflib
+import os
+from typing import List, Optional
+
+import numpy as np
+
+import geocoding
+from geocoding import normalize_city_name
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_SOURCE = os.path.join(DATA_DIR, "cities.csv")
+DEFAULT_INDEX = os.path.join(DATA_DIR, "cities.npy")
+
+INDEX_DTYPE = np.dtype([
+    ("key", "S48"),
+    ("name", "S48"),
+    ("latitude", "f4"),
+    ("longitude", "f4"),
+    ("population", "i8"),
+    ("country", "S40"),
+    ("country_code", "S2"),
+    ("elevation", "f4"),
+    ("timezone", "S32"),
+])
+
+# GeoNames dump columns (cities500.txt, cities15000.txt, ...)
+_GEONAMES_COLUMNS = {"name": 1, "latitude": 4, "longitude": 5, "country_code": 8,
+                     "population": 14, "elevation": 16, "dem": 15, "timezone": 17}
+
+
+def _encode(value, size):
+    return str(value or "").encode("utf-8")[:size]
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def _read_geonames(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            elevation = cols[_GEONAMES_COLUMNS["elevation"]] or cols[_GEONAMES_COLUMNS["dem"]]
+            yield {
+                "name": cols[_GEONAMES_COLUMNS["name"]],
+                "latitude": cols[_GEONAMES_COLUMNS["latitude"]],
+                "longitude": cols[_GEONAMES_COLUMNS["longitude"]],
+                "population": cols[_GEONAMES_COLUMNS["population"]] or 0,
+                "country": cols[_GEONAMES_COLUMNS["country_code"]],
+                "country_code": cols[_GEONAMES_COLUMNS["country_code"]],
+                "elevation": elevation or 0,
+                "timezone": cols[_GEONAMES_COLUMNS["timezone"]],
+            }
+
+
+def build_index(source: str = DEFAULT_SOURCE, index_path: str = DEFAULT_INDEX) -> str:
+    """
+    Builds the memory-mappable index from a city dataset.
+
+    Args:
+        source (str, optional): CSV with name, latitude, longitude, population, country,
+            country_code, elevation and timezone columns, or a GeoNames ".txt" dump.
+            Defaults to the bundled data/cities.csv.
+        index_path (str, optional): Where to write the .npy index. Defaults to data/cities.npy.
+
+    Returns:
+        str: The index path.
+    """
+    rows = _read_geonames(source) if source.endswith(".txt") else _read_csv(source)
+    records = [(
+        _encode(normalize_city_name(row["name"]), 48),
+        _encode(row["name"], 48),
+        float(row["latitude"]),
+        float(row["longitude"]),
+        int(float(row["population"] or 0)),
+        _encode(row["country"], 40),
+        _encode(row["country_code"], 2),
+        float(row["elevation"] or 0),
+        _encode(row["timezone"], 32),
+    ) for row in rows]
+    index = np.array(records, dtype=INDEX_DTYPE)
+    # Sorted by key, most populous first among namesakes, so the first hit is the likeliest city
+    index = index[np.lexsort((-index["population"], index["key"]))]
+    np.save(index_path, index)
+    return index_path
+
+
+def _to_record(row) -> dict:
+    # Same keys as an Open-Meteo geocoding result
+    return {
+        "name": row["name"].decode("utf-8", "ignore"),
+        "latitude": round(float(row["latitude"]), 4),
+        "longitude": round(float(row["longitude"]), 4),
+        "population": int(row["population"]),
+        "country": row["country"].decode("utf-8", "ignore"),
+        "country_code": row["country_code"].decode("utf-8", "ignore"),
+        "elevation": float(row["elevation"]),
+        "timezone": row["timezone"].decode("utf-8", "ignore"),
+    }
+
+
+class Gazetteer:
+    """
+    Sorted-array city index with exact, prefix and fuzzy lookups.
+
+    Args:
+        index_path (str, optional): The .npy index, built from source when missing or stale.
+        source (str, optional): Dataset used to build a missing index.
+        fuzzy_cutoff (float, optional): Minimum similarity for fuzzy matches. Defaults to 0.8.
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX, source: str = DEFAULT_SOURCE, fuzzy_cutoff: float = 0.8):
+        # Rebuilt when missing or older than its dataset
+        if not os.path.exists(index_path) or (os.path.exists(source)
+                                              and os.path.getmtime(source) > os.path.getmtime(index_path)):
+            build_index(source, index_path)
+        self.index = np.load(index_path, mmap_mode="r")
+        self.keys = self.index["key"]
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+    def __len__(self):
+        return len(self.index)
+
+    def _range(self, prefix: bytes):
+        lo = int(np.searchsorted(self.keys, prefix, side="left"))
+        hi = int(np.searchsorted(self.keys, prefix + b"\xff", side="left"))
+        return lo, hi
+
+    def _matches(self, city_name: str):
+        key = normalize_city_name(city_name).encode("utf-8")
+        return (int(np.searchsorted(self.keys, key, side="left")),
+                int(np.searchsorted(self.keys, key, side="right")))
+
+    def exact(self, city_name: str) -> Optional[dict]:
+        """The most populous city of that name, or None."""
+        lo, hi = self._matches(city_name)
+        return _to_record(self.index[lo]) if hi > lo else None
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Cities whose normalized name starts with prefix, most populous first."""
+        lo, hi = self._range(normalize_city_name(prefix).encode("utf-8"))
+        rows = self.index[lo:hi]
+        order = np.argsort(-rows["population"], kind="stable")[:limit]
+        return [_to_record(rows[i]) for i in order]
+
+    def fuzzy(self, city_name: str) -> Optional[dict]:
+        """Closest spelling among names sharing the first letter, or None below the cutoff."""
+        key = normalize_city_name(city_name)
+        if not key:
+            return None
+        lo, hi = self._range(key[:1].encode("utf-8"))
+        candidates = [k.decode("utf-8", "ignore") for k in self.keys[lo:hi]]
+        match = difflib.get_close_matches(key, candidates, n=1, cutoff=self.fuzzy_cutoff)
+        return self.exact(match[0]) if match else None
+
+    def lookup(self, city_name: str) -> Optional[dict]:
+        # Exact only: a close spelling may be a different city ("Bern" vs "Berlin").
+        # A name with namesakes ("Hyderabad") is left to the API, which may know a likelier one.
+        lo, hi = self._matches(city_name)
+        return _to_record(self.index[lo]) if hi - lo == 1 else None
+
+
+def enable_gazetteer(index_path: str = DEFAULT_INDEX, source: str = DEFAULT_SOURCE, **kwargs) -> Gazetteer:
+    """Turns on offline lookups in geocoding.lookup_city and returns the loaded index."""
+    gazetteer = Gazetteer(index_path, source, **kwargs)
+    geocoding.set_offline_index(gazetteer)
+    return gazetteer
+
+
+def disable_gazetteer():
+    geocoding.set_offline_index(None)
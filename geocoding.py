@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+# Geocoding layer shared by get_lat_long_from_city and extract_city_info:
+# normalized keys, an in-memory LRU and a persistent SQLite store in front of
+# the Open-Meteo geocoding API.
+
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from openmeteo_client import get_registry
+
+GEOCODING_URL: str = "https://geocoding-api.open-meteo.com/v1/search"
+
+# Common short forms mapped to the name the geocoding API knows
+CITY_ALIASES: Dict[str, str] = {
+    "nyc": "new york",
+    "new york city": "new york",
+    "ny": "new york",
+    "la": "los angeles",
+    "sf": "san francisco",
+    "dc": "washington",
+    "washington dc": "washington",
+    "khi": "karachi",
+    "isb": "islamabad",
+    "lhr": "lahore",
+    "rwp": "rawalpindi",
+    "pindi": "rawalpindi",
+    "bombay": "mumbai",
+    "calcutta": "kolkata",
+    "madras": "chennai",
+    "peking": "beijing",
+    "saigon": "ho chi minh city",
+    "hcmc": "ho chi minh city",
+    "kiev": "kyiv",
+}
+
+
+def _fold(city_name: str) -> str:
+    name = unicodedata.normalize("NFKD", str(city_name))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r"[^\w\s]", " ", name.lower())
+    return " ".join(name.split())
+
+
+def normalize_city_name(city_name: str) -> str:
+    """
+    Normalizes a city name into a cache key.
+
+    Lowercases, strips diacritics and punctuation, collapses whitespace and
+    resolves common aliases, so "  São Paulo ", "sao paulo" and "SAO-PAULO"
+    share one entry and "NYC" resolves to "new york".
+    """
+    name = _fold(city_name)
+    return CITY_ALIASES.get(name, name)
+
+
+def search_name(city_name: str) -> str:
+    """The name to query the API with: the alias target for an alias, else the name as written ("Xi'an", "São Paulo")."""
+    alias = CITY_ALIASES.get(_fold(city_name))
+    return alias if alias is not None else " ".join(str(city_name).split())
+
+
+class GeocodingCache:
+    """
+    Two-level cache of geocoding records keyed by (normalized name, language).
+
+    Args:
+        path (str, optional): SQLite file for the persistent store. Defaults to ".geocoding.sqlite".
+        lru_size (int, optional): Records kept in memory. Defaults to 1024.
+    """
+
+    def __init__(self, path: str = ".geocoding.sqlite", lru_size: int = 1024):
+        self.path = path
+        self.lru_size = lru_size
+        self._lru: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS cities (key TEXT PRIMARY KEY, record TEXT NOT NULL)")
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, record):
+        self._lru[key] = record
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            record = self._lru.get(key)
+            if record is not None:
+                self._lru.move_to_end(key)
+                return record
+            row = self._connection().execute("SELECT record FROM cities WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[0])
+            self._remember(key, record)
+            return record
+
+    def set(self, key: str, record: dict):
+        with self._lock:
+            self._remember(key, record)
+            db = self._connection()
+            db.execute("INSERT OR REPLACE INTO cities (key, record) VALUES (?, ?)", (key, json.dumps(record)))
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache: Optional[GeocodingCache] = None
+_cache_lock = threading.Lock()
+# Local index consulted before the API, see gazetteer.enable_gazetteer()
+_offline_index = None
+
+
+def get_geocoding_cache(**kwargs) -> GeocodingCache:
+    # kwargs apply on first use only
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodingCache(**kwargs)
+    return _cache
+
+
+def set_offline_index(index):
+    global _offline_index
+    _offline_index = index
+
+
+def offline_lookup(city_name: str, language: str = 'en') -> Optional[dict]:
+    # The bundled dataset only carries English names
+    if _offline_index is None or language != 'en':
+        return None
+    return _offline_index.lookup(city_name)
+
+
+def offline_fuzzy_lookup(city_name: str, language: str = 'en') -> Optional[dict]:
+    # Closest spelling in the gazetteer; a guess, so callers never cache it
+    if _offline_index is None or language != 'en':
+        return None
+    return _offline_index.fuzzy(city_name)
+
+
+def cached_city(city_name: str, language: str = 'en') -> Optional[dict]:
+    """The record for a city from the cache or the gazetteer only, never the API."""
+    record = get_geocoding_cache().get(cache_key(city_name, language))
+    return record if record is not None else offline_lookup(city_name, language)
+
+
+def cache_key(city_name: str, language: str = 'en') -> str:
+    return f"{language}:{normalize_city_name(city_name)}"
+
+
+def geocoding_params(city_name: str, language: str = 'en') -> dict:
+    # The normalized name is only the cache key; the API matches the spelling as written
+    return {'name': search_name(city_name), 'count': 1, 'language': language, 'format': 'json'}
+
+
+def first_result(results) -> Optional[dict]:
+    # The search endpoint omits "results" entirely when nothing matched
+    if results and results.get('results'):
+        return results['results'][0]
+    return None
+
+
+def lookup_city(city_name: str, language: str = 'en') -> Optional[dict]:
+    """
+    Returns the full geocoding record for a city, from cache when possible.
+
+    The record is the first entry of the API "results" list, so both the
+    coordinate tuple and the city info are filled from one lookup. When the
+    gazetteer is enabled an exact name answers first; if the API then fails,
+    the closest gazetteer spelling is returned without being cached.
+    Raises requests exceptions on network errors without a gazetteer match;
+    returns None when the API knows no such city.
+    """
+    key = cache_key(city_name, language)
+    cache = get_geocoding_cache()
+    record = cache.get(key)
+    if record is not None:
+        return record
+    record = offline_lookup(city_name, language)
+    if record is not None:
+        cache.set(key, record)
+        return record
+
+    try:
+        response = get_registry().plain_session.get(GEOCODING_URL, params=geocoding_params(city_name, language))
+        response.raise_for_status()  # Raise an exception for bad responses (4xx and 5xx)
+        results = response.json()
+    except Exception:
+        record = offline_fuzzy_lookup(city_name, language)
+        if record is None:
+            raise
+        return record
+    record = first_result(results)
+    if record is not None:
+        cache.set(key, record)
+    return record
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+# Grid-cell canonicalization of request coordinates. Requests are keyed by the
+# point snapped to the endpoint's resolution. Open-Meteo answers from the
+# nearest model grid cell and reports it in Latitude()/Longitude(); once two
+# snapped points are known to fall in the same cell, the later one is sent as
+# the first, so they share one request and one cache entry.
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Quantization step in degrees per endpoint, no coarser than the endpoint's finest model grid
+GRID_RESOLUTION: Dict[str, float] = {
+    "https://api.open-meteo.com/v1/forecast": 0.025,
+    "https://air-quality-api.open-meteo.com/v1/air-quality": 0.1,
+    "https://marine-api.open-meteo.com/v1/marine": 0.05,
+    "https://flood-api.open-meteo.com/v1/flood": 0.05,
+    "https://climate-api.open-meteo.com/v1/climate": 0.1,
+}
+DEFAULT_RESOLUTION = 0.01
+
+
+def endpoint_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def resolution_for(url: str) -> float:
+    return GRID_RESOLUTION.get(endpoint_of(url), DEFAULT_RESOLUTION)
+
+
+def snap(value: float, step: float) -> float:
+    return round(round(float(value) / step) * step, 4)
+
+
+def _as_list(value):
+    if isinstance(value, (list, tuple)):
+        return [float(v) for v in value]
+    if isinstance(value, str) and "," in value:
+        return [float(v) for v in value.split(",")]
+    return [float(value)]
+
+
+class GridMap:
+    """
+    Learned grid cells of snapped request points, per endpoint.
+
+    The first snapped point seen in a cell represents it: get() maps any
+    other snapped point of that cell to the representative, and the
+    representative to itself, so a query's key never changes once learned.
+
+    Args:
+        max_entries (int, optional): Points remembered per endpoint. Defaults to 10000.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._cells: Dict[str, OrderedDict] = {}
+        self._representatives: Dict[str, Dict[Tuple[float, float], Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, point: Tuple[float, float]) -> Optional[Tuple[float, float]]:
+        """The snapped point representing the cell of point, or None if its cell is not known."""
+        with self._lock:
+            cells = self._cells.get(endpoint)
+            cell = cells.get(point) if cells else None
+            return None if cell is None else self._representatives[endpoint].get(cell, point)
+
+    def learn(self, endpoint: str, point: Tuple[float, float], cell: Tuple[float, float]):
+        with self._lock:
+            cells = self._cells.setdefault(endpoint, OrderedDict())
+            representatives = self._representatives.setdefault(endpoint, {})
+            cells[point] = cell
+            cells.move_to_end(point)
+            representatives.setdefault(cell, point)
+            while len(cells) > self.max_entries:
+                evicted, evicted_cell = cells.popitem(last=False)
+                if representatives.get(evicted_cell) == evicted:
+                    del representatives[evicted_cell]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(cells) for cells in self._cells.values())
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._representatives.clear()
+
+
+grid_map = GridMap()
+
+
+def snapped_points(url: str, params: dict) -> List[Tuple[float, float]]:
+    """The request's points snapped to the endpoint's resolution; independent of anything learned."""
+    if "latitude" not in params or "longitude" not in params:
+        return []
+    step = resolution_for(url)
+    return [(snap(lat, step), snap(lon, step))
+            for lat, lon in zip(_as_list(params["latitude"]), _as_list(params["longitude"]))]
+
+
+def _with_points(params: dict, points: List[Tuple[float, float]]) -> dict:
+    params = dict(params)
+    if isinstance(params["latitude"], (list, tuple)):
+        params["latitude"] = [lat for lat, _ in points]
+        params["longitude"] = [lon for _, lon in points]
+    elif len(points) == 1:
+        params["latitude"], params["longitude"] = points[0]
+    else:
+        # Keep the comma-separated form Open-Meteo expects for several locations
+        params["latitude"] = ",".join(str(lat) for lat, _ in points)
+        params["longitude"] = ",".join(str(lon) for _, lon in points)
+    return params
+
+
+def snapped(url: str, params: dict) -> dict:
+    """params with latitude/longitude snapped: a stable key for the query, whatever was learned since."""
+    points = snapped_points(url, params)
+    return _with_points(params, points) if points else params
+
+
+def canonicalize(url: str, params: dict) -> Tuple[dict, List[Tuple[float, float]]]:
+    """
+    Rewrites latitude/longitude in params to the coordinates sent upstream.
+
+    Each point is snapped to the endpoint's resolution. A snapped point whose
+    cell is already represented by another snapped point is replaced by that
+    point, so both share one request; the point first seen in a cell is always
+    sent unchanged.
+
+    Returns:
+        tuple: The rewritten params and the snapped points, to pass to learn().
+    """
+    points = snapped_points(url, params)
+    if not points:
+        return params, []
+    endpoint = endpoint_of(url)
+    return _with_points(params, [grid_map.get(endpoint, point) or point for point in points]), points
+
+
+def learn(url: str, points: List[Tuple[float, float]], responses):
+    # Responses come back in request order, one per location
+    endpoint = endpoint_of(url)
+    for point, response in zip(points, responses):
+        cell = (round(float(response.Latitude()), 4), round(float(response.Longitude()), 4))
+        grid_map.learn(endpoint, point, cell)
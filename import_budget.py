@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+# Startup check: importing the tools must stay cheap. Each module is imported
+# in a fresh interpreter, which must not load the heavy dependencies listed
+# below, open a cache file or exceed the time budget.
+#
+#   python import_budget.py             # functions and conversation
+#   python import_budget.py batch 250   # one module, custom budget in ms
+
+import json
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Milliseconds a cold import may take
+IMPORT_BUDGET_MS = 300
+# Dependencies that must only load on first use
+DEFERRED = ("openai", "dotenv", "pandas", "requests", "requests_cache", "openmeteo_requests", "retry_requests")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+import openmeteo_client
+print(json.dumps({{"ms": elapsed, "loaded": [name for name in {deferred!r} if name in sys.modules],
+                  "client_created": openmeteo_client._registry is not None}}))
+"""
+
+
+def measure(module: str) -> Dict:
+    """Cold import time and side effects of a module, from a fresh interpreter."""
+    probe = _PROBE.format(module=module, deferred=DEFERRED)
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check(module: str, budget_ms: float = IMPORT_BUDGET_MS, result: Optional[Dict] = None) -> List[str]:
+    """Problems found importing module; empty if it is within budget. result is a measure() to reuse."""
+    result = result or measure(module)
+    problems = []
+    if result["ms"] > budget_ms:
+        problems.append(f"{module}: import took {result['ms']:.0f} ms, budget {budget_ms:.0f} ms")
+    if result["loaded"]:
+        problems.append(f"{module}: loaded {', '.join(result['loaded'])} at import")
+    if result["client_created"]:
+        problems.append(f"{module}: created the Open-Meteo client at import")
+    return problems
+
+
+if __name__ == "__main__":
+    modules = sys.argv[1:2] or ["functions", "conversation"]
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET_MS
+    failures = []
+    for module in modules:
+        result = measure(module)
+        print(f"{module}: {result['ms']:.0f} ms")
+        failures += check(module, budget, result)
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
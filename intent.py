@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+# Local intent classifier. Maps a user request to the tool families it needs
+# (weather, air quality, marine, flood, climate) with keyword patterns, so
+# run_conversation sends the model only those tools instead of all of them.
+# When nothing matches, every tool is sent.
+
+import re
+from typing import Dict, Optional, Set, Tuple
+
+# Keyword patterns per tool family; stems spell out their inflections with \w*
+INTENT_PATTERNS: Dict[str, str] = {
+    "weather": r"weather|temperat\w*|forecasts?|rain\w*|snow\w*|drizzle|showers?|storm\w*|thunder\w*|"
+               r"wind(y|s)?|gusts?|humid\w*|cloud\w*|sunny|sunshine|sunrise|sunset|fog\w*|hot|cold|warm\w*|"
+               r"cool\w*|freez\w*|precipitation|uv|umbrella|is it (day|night)|day ?time|night ?time|daylight",
+    "air_quality": r"air|aqi|pollut\w*|smog\w*|haze|hazy|pm ?2\.?5|pm ?10|ozone|o3|no2|so2|dust\w*|pollen|"
+                   r"breath\w*|masks?",
+    "marine": r"marine|seas?|ocean\w*|waves?|swells?|surf\w*|tides?|beach\w*|coast\w*|sail\w*|boat\w*",
+    "flood": r"flood\w*|rivers?|discharge|stream ?flow|overflow\w*|inundat\w*",
+    "climate": r"climate|warming|anomal\w*|baseline|projection\w*|long[- ]term|decades?|"
+               r"(in|by|for|year) (19[5-9]\d|20[3-5]\d)",
+}
+# Finer topics within a family, so answers to different questions about the same data stay apart;
+# opposites (day/night, hot/cold, rain/snow, sun/cloud) are separate topics, as a yes/no answer to one is wrong for the other
+INTENT_TOPICS: Dict[str, Tuple[str, str]] = {
+    "temperature": ("weather", r"temperat\w*|degrees?"),
+    "heat": ("weather", r"hot|warm\w*|heat\w*"),
+    "cold": ("weather", r"cold|cool\w*|freez\w*"),
+    "rain": ("weather", r"rain\w*|drizzle|showers?|umbrella"),
+    "snow": ("weather", r"snow\w*"),
+    "precipitation": ("weather", r"precipitation"),
+    "wind": ("weather", r"wind(y|s)?|gusts?"),
+    "sun": ("weather", r"sunny|sunshine"),
+    "cloud": ("weather", r"cloud\w*|fog\w*"),
+    "storm": ("weather", r"storm\w*|thunder\w*"),
+    "day": ("weather", r"is it day|day ?time"),
+    "night": ("weather", r"is it night|night ?time"),
+    "daylight": ("weather", r"daylight|sunrise|sunset"),
+    "humidity": ("weather", r"humid\w*"),
+    "uv": ("weather", r"uv"),
+    "particulates": ("air_quality", r"pm ?2\.?5|pm ?10|dust\w*"),
+    "gases": ("air_quality", r"ozone|o3|no2|so2"),
+    "pollen": ("air_quality", r"pollen"),
+    "waves": ("marine", r"waves?|swells?|surf\w*"),
+    "climate_anomaly": ("climate", r"anomal\w*|baseline|compar\w*"),
+}
+# Families sent with any other: data tools need coordinates for a city name
+ALWAYS_WITH = ("geocoding",)
+
+_PATTERNS = {family: re.compile(rf"\b({pattern})\b", re.IGNORECASE) for family, pattern in INTENT_PATTERNS.items()}
+_TOPICS = {topic: re.compile(rf"\b({pattern})\b", re.IGNORECASE) for topic, (_, pattern) in INTENT_TOPICS.items()}
+
+
+def classify(text: str) -> Set[str]:
+    """Tool families whose keywords appear in the request."""
+    return {family for family, pattern in _PATTERNS.items() if pattern.search(text or "")}
+
+
+def topics(text: str) -> Set[str]:
+    """The topics a request asks about; a family matched without a finer topic stands for itself."""
+    families = classify(text)
+    found = {topic for topic, pattern in _TOPICS.items() if INTENT_TOPICS[topic][0] in families
+             and pattern.search(text or "")}
+    return found | (families - {INTENT_TOPICS[topic][0] for topic in found})
+
+
+def select_families(text: str) -> Optional[Set[str]]:
+    """
+    Tool families to send for a request.
+
+    Args:
+        text (str): The user request.
+
+    Returns:
+        set or None: The matched families plus ALWAYS_WITH, or None (every tool) if none matched.
+    """
+    families = classify(text)
+    if not families:
+        return None
+    return families | set(ALWAYS_WITH)
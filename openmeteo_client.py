@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+
+import atexit
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+import grid
+from cache_policy import STALE_WHILE_REVALIDATE, data_versions, refresher, ttl_for
+from singleflight import SingleFlight, freeze
+
+if TYPE_CHECKING:
+    import openmeteo_requests
+    import requests_cache
+
+# Every Open-Meteo host the fetchers in functions.py talk to
+OPEN_METEO_HOSTS: Dict[str, str] = {
+    "forecast": "https://api.open-meteo.com",
+    "air_quality": "https://air-quality-api.open-meteo.com",
+    "marine": "https://marine-api.open-meteo.com",
+    "flood": "https://flood-api.open-meteo.com",
+    "climate": "https://climate-api.open-meteo.com",
+    "geocoding": "https://geocoding-api.open-meteo.com",
+}
+
+
+class OpenMeteoClient:
+    """
+    openmeteo_requests.Client front end used by every fetcher.
+
+    Coordinates are snapped to the endpoint's resolution before the request,
+    so a repeated query always has the same cache key. The cell each response
+    reports is learned, and later points in a known cell are sent as the
+    point first seen there, sharing its cache entry. Identical canonical
+    requests made concurrently share one upstream call; see flight.stats().
+    Each request is cached for the TTL cache_policy gives its endpoint and blocks;
+    callers that keep the decoded result themselves pass cache_raw=False so
+    the raw body is not stored in the HTTP cache as well.
+
+    Args:
+        client (openmeteo_requests.Client): Client on the cached session.
+        expire_after (int, optional): TTL for endpoints without a policy. Defaults to 3600.
+    """
+
+    def __init__(self, client: "openmeteo_requests.Client", expire_after: int = 3600):
+        self._client = client
+        self.expire_after = expire_after
+        self.flight = SingleFlight()
+
+    def weather_api(self, url: str, params: dict, cache_raw: bool = True, **kwargs):
+        from requests_cache import DO_NOT_CACHE
+        requested = params
+        params, points = grid.canonicalize(url, params)
+        kwargs.setdefault("expire_after", ttl_for(url, params, default=self.expire_after) if cache_raw else DO_NOT_CACHE)
+        key = (url, freeze(params), freeze(kwargs))
+        responses = self.flight.do(key, lambda: self._client.weather_api(url, params=params, **kwargs))
+        grid.learn(url, points, responses)
+        if kwargs.get("force_refresh"):
+            data_versions.bump(url, requested)
+        return responses
+
+
+class ClientRegistry:
+    """
+    Owns the process-wide Open-Meteo session and client.
+
+    One cached session is shared by every fetcher, with a keep-alive
+    connection pool mounted per Open-Meteo host, so repeated tool calls reuse
+    the SQLite cache handle and the open TLS connections. Entries expire per
+    cache_policy.ttl_for; a just-expired entry is served while requests_cache
+    refreshes it in the background.
+
+    Args:
+        cache_path (str, optional): Path to the cache file. Defaults to ".cache".
+        expire_after (int, optional): Cache expiration time in seconds for endpoints without a policy. Defaults to 3600.
+        retries (int, optional): Number of retries in case of an error. Defaults to 5.
+        backoff_factor (float, optional): Factor by which the delay between retries will increase. Defaults to 0.2.
+        pool_size (int, optional): Keep-alive connections kept per host. Defaults to 10.
+        stale_while_revalidate (int, optional): Seconds past expiry an entry is still served. Defaults to STALE_WHILE_REVALIDATE.
+    """
+
+    def __init__(self, cache_path: str = ".cache", expire_after: int = 3600, retries: int = 5,
+                 backoff_factor: float = 0.2, pool_size: int = 10,
+                 stale_while_revalidate: int = STALE_WHILE_REVALIDATE):
+        self.cache_path = cache_path
+        self.expire_after = expire_after
+        self.stale_while_revalidate = stale_while_revalidate
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._session = None
+        self._client = None
+        self._plain_session = None
+
+    def _mount_pools(self, session):
+        from requests.adapters import HTTPAdapter
+        from urllib3 import Retry
+        # Longest prefix wins in requests, so these override the generic adapters from retry()
+        for host in OPEN_METEO_HOSTS.values():
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.pool_size,
+                max_retries=Retry(total=self.retries, read=self.retries, connect=self.retries,
+                                  backoff_factor=self.backoff_factor, status_forcelist=(500, 502, 504)),
+            )
+            session.mount(host, adapter)
+        return session
+
+    @property
+    def session(self) -> "requests_cache.CachedSession":
+        """Cached, retrying session shared by all Open-Meteo requests."""
+        if self._session is None:
+            # The HTTP stack is only imported once a session is needed
+            import requests_cache
+            from retry_requests import retry
+            with self._lock:
+                if self._session is None:
+                    cache_session = requests_cache.CachedSession(self.cache_path, expire_after=self.expire_after,
+                                                                 stale_while_revalidate=self.stale_while_revalidate)
+                    retry_session = retry(cache_session, retries=self.retries, backoff_factor=self.backoff_factor)
+                    self._session = self._mount_pools(retry_session)
+        return self._session
+
+    @property
+    def plain_session(self):
+        """Uncached pooled session for endpoints that should not go through the HTTP cache."""
+        if self._plain_session is None:
+            from retry_requests import retry
+            with self._lock:
+                if self._plain_session is None:
+                    self._plain_session = self._mount_pools(retry(retries=self.retries, backoff_factor=self.backoff_factor))
+        return self._plain_session
+
+    @property
+    def client(self) -> OpenMeteoClient:
+        """Open-Meteo client bound to the shared session."""
+        if self._client is None:
+            import openmeteo_requests
+            session = self.session
+            with self._lock:
+                if self._client is None:
+                    self._client = OpenMeteoClient(openmeteo_requests.Client(session=session), self.expire_after)
+        return self._client
+
+    def compact(self):
+        """Drops expired responses from the HTTP cache and vacuums its file."""
+        if self._session is not None:
+            self._session.cache.delete(expired=True, vacuum=True)
+
+    def close(self):
+        """Close pooled connections and the cache backend."""
+        refresher.shutdown(wait=False)
+        with self._lock:
+            for session in (self._session, self._plain_session):
+                if session is not None:
+                    session.close()
+            self._session = None
+            self._plain_session = None
+            self._client = None
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(**kwargs) -> ClientRegistry:
+    """
+    Returns the process-wide registry, creating it on first use.
+
+    Keyword arguments are passed to ClientRegistry and only take effect when
+    the registry is created; call shutdown() first to reconfigure it.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry(**kwargs)
+    return _registry
+
+
+def shutdown():
+    """Closes the shared registry. Safe to call more than once."""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+            _registry = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+# Request window planner: turns a target date, datetime or year into the
+# start_date/end_date to request, and rejects dates the endpoint cannot serve
+# before any request is made. Recent and forecast dates share one window per
+# endpoint, so questions about different days reuse one cached series.
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import grid
+from timeseries import parse_when
+
+# Range each endpoint serves: fixed first/last dates, or days back/ahead of today
+ENDPOINT_WINDOWS: Dict[str, dict] = {
+    "https://api.open-meteo.com/v1/forecast": {"past_days": 92, "forecast_days": 16},
+    "https://air-quality-api.open-meteo.com/v1/air-quality": {"past_days": 92, "forecast_days": 7},
+    "https://marine-api.open-meteo.com/v1/marine": {"past_days": 92, "forecast_days": 16},
+    "https://flood-api.open-meteo.com/v1/flood": {"first_date": date(1984, 1, 1), "forecast_days": 210},
+    "https://climate-api.open-meteo.com/v1/climate": {"first_date": date(1950, 1, 1), "last_date": date(2050, 12, 31)},
+}
+
+
+# Shared window per endpoint: days ahead of today it reaches, and the most days it may span.
+# The span is the size of the original past_days/forecast_days request, so no request grows.
+SHARED_WINDOWS: Dict[str, Tuple[int, int]] = {
+    "https://api.open-meteo.com/v1/forecast": (16, 99),
+    "https://air-quality-api.open-meteo.com/v1/air-quality": (7, 97),
+    "https://marine-api.open-meteo.com/v1/marine": (16, 99),
+    "https://flood-api.open-meteo.com/v1/flood": (16, 184),
+}
+# Days before today every shared window starts
+SHARED_PAST_DAYS = 7
+
+
+class DateOutOfRange(ValueError):
+    """The target lies outside what the endpoint can serve."""
+
+
+def valid_range(url: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """First and last date the endpoint serves, as of `today` (UTC)."""
+    window = ENDPOINT_WINDOWS[grid.endpoint_of(url)]
+    today = today or datetime.now(timezone.utc).date()
+    first = window.get("first_date") or today - timedelta(days=window["past_days"])
+    last = window.get("last_date") or today + timedelta(days=window["forecast_days"] - 1)
+    return first, last
+
+
+def _check(url: str, first_day: date, last_day: date, today: Optional[date] = None):
+    first, last = valid_range(url, today)
+    if first_day < first or last_day > last:
+        raise DateOutOfRange(f"{grid.endpoint_of(url)} serves {first} to {last}, not {first_day} to {last_day}")
+
+
+def plan_days(url: str, start, end=None, today: Optional[date] = None) -> Dict[str, str]:
+    """
+    start_date/end_date covering the days of `start` through `end` (inclusive).
+
+    The window is widened to the endpoint's shared one (SHARED_WINDOWS), from
+    SHARED_PAST_DAYS before today to a short forecast horizon, so any recent
+    or forecast date maps to the same request and cached series. A range the
+    widened window would stretch past the endpoint's maximum span is planned
+    as asked. Works for both daily and hourly blocks. Raises DateOutOfRange
+    for dates the endpoint cannot serve.
+    """
+    first_day = parse_when(start).date()
+    last_day = parse_when(end).date() if end is not None else first_day
+    if last_day < first_day:
+        raise DateOutOfRange(f"end date {last_day} is before start date {first_day}")
+    _check(url, first_day, last_day, today)
+    shared = SHARED_WINDOWS.get(grid.endpoint_of(url))
+    if shared is not None:
+        days_ahead, max_days = shared
+        today = today or datetime.now(timezone.utc).date()
+        first, last = valid_range(url, today)
+        widened_first = max(first, min(first_day, today - timedelta(days=SHARED_PAST_DAYS)))
+        widened_last = min(last, max(last_day, today + timedelta(days=days_ahead - 1)))
+        if (widened_last - widened_first).days < max_days:
+            first_day, last_day = widened_first, widened_last
+    return {"start_date": first_day.isoformat(), "end_date": last_day.isoformat()}
+
+
+def plan_year(url: str, year, today: Optional[date] = None) -> Dict[str, str]:
+    """start_date/end_date covering one calendar year."""
+    year = int(year)
+    first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+    _check(url, first_day, last_day, today)
+    return {"start_date": first_day.isoformat(), "end_date": last_day.isoformat()}
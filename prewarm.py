@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+# Cache prewarming for hot locations. Each (location, tool) pair is refetched
+# shortly before its cache entry expires, with the first refreshes spread over
+# the TTL and every later one jittered, so rollovers never line up and the
+# first user question after one is served warm.
+
+import heapq
+import itertools
+import random
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import functions
+from cache_policy import DEFAULT_TTL, ttl_for
+from geocoding import lookup_city
+from openmeteo_client import get_registry
+from series_store import get_series_store
+from timeseries import refresh_series
+
+# Tools whose data is prefetched, with the block each one reads ("current" is HTTP-cached only)
+PREWARM_TOOLS: Dict[str, str] = {
+    "describe_current_weather": "current",
+    "get_today_weather_data": "daily",
+    "air_quality_data": "hourly",
+    "hourly_marine_data": "hourly",
+    "daily_river_discharge": "daily",
+}
+# Fraction of the TTL after which an entry is refreshed, before it can expire
+REFRESH_AT = 0.8
+# Seconds between HTTP cache and series store compactions
+MAINTENANCE_EVERY = 3600
+
+
+def _local_today(longitude: float) -> date:
+    # Date at the location by its solar time zone; the exact UTC offset is only known from a response
+    return (datetime.now(timezone.utc) + timedelta(hours=round(longitude / 15))).date()
+
+
+def _request(tool: str, latitude: float, longitude: float):
+    # The tools' own request builders, so the planned window is the one a question about today uses
+    build_request = getattr(functions, f"_{tool}_request")
+    if tool == "describe_current_weather":
+        return build_request(latitude, longitude)
+    return build_request(latitude, longitude, _local_today(longitude).isoformat())
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Blocks until a request may be made; False if stop was set meanwhile."""
+        while not stop.is_set():
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            stop.wait((1 - self._tokens) / self.rate)
+        return False
+
+
+class Prewarmer:
+    """
+    Keeps the caches behind PREWARM_TOOLS warm for a list of locations.
+
+    Args:
+        locations (iterable): City names or (latitude, longitude) pairs.
+        tools (iterable, optional): Tools to prewarm. Defaults to PREWARM_TOOLS.
+        rate (float, optional): Upstream requests per second. Defaults to 1.0.
+        jitter (float, optional): Random spread of each refresh, as a fraction of the TTL. Defaults to 0.1.
+        openmeteo (optional): Open-Meteo client. Defaults to the shared client.
+    """
+
+    def __init__(self, locations: Iterable, tools: Optional[Iterable[str]] = None, rate: float = 1.0,
+                 jitter: float = 0.1, openmeteo=None):
+        self.locations = list(locations)
+        self.tools = list(tools or PREWARM_TOOLS)
+        self.limiter = RateLimiter(rate)
+        self.jitter = jitter
+        self.openmeteo = openmeteo
+        self._queue: List[Tuple[float, int, Tuple]] = []
+        self._order = itertools.count()
+        self._report: Dict[Tuple, dict] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _client(self):
+        return self.openmeteo or functions.get_openmeteo_client()
+
+    def _resolve(self, location) -> Optional[Tuple[float, float]]:
+        if isinstance(location, str):
+            record = lookup_city(location)
+            return (float(record["latitude"]), float(record["longitude"])) if record else None
+        latitude, longitude = location
+        return float(latitude), float(longitude)
+
+    def _schedule(self, job: Tuple, delay: float):
+        heapq.heappush(self._queue, (time.monotonic() + max(0.0, delay), next(self._order), job))
+
+    def _plan(self):
+        # First refreshes are spread uniformly over each job's TTL so they never fire together
+        for location in self.locations:
+            try:
+                point = self._resolve(location)
+            except Exception as e:
+                print(f"Exception: {location}: {e}")
+                point = None
+            if point is None:
+                self._report[(str(location), None)] = {"location": str(location), "error": "location not found"}
+                continue
+            for tool in self.tools:
+                job = (str(location), tool, point)
+                self._report[job[:2]] = {"location": job[0], "tool": tool, "warmed": 0, "failed": 0,
+                                         "last_warmed": None, "last_error": None}
+                self._schedule(job, random.uniform(0, self._ttl(tool, point) * REFRESH_AT))
+
+    def _ttl(self, tool: str, point: Tuple[float, float]) -> float:
+        url, params = _request(tool, *point)
+        return ttl_for(url, params)
+
+    def warm(self, job: Tuple) -> float:
+        """Refetches one (location, tool) and returns the TTL of what was stored."""
+        _, tool, (latitude, longitude) = job
+        url, params = _request(tool, latitude, longitude)
+        block = PREWARM_TOOLS[tool]
+        if block == "current":
+            self._client().weather_api(url, params=params, force_refresh=True)
+        else:
+            refresh_series(self._client(), url, params, block)
+        return ttl_for(url, params)
+
+    def run_once(self):
+        """Warms every job once, ignoring the schedule."""
+        if not self._report:
+            self._plan()
+        for _, _, job in sorted(self._queue):
+            if not self.limiter.wait(self._stop):
+                return
+            self._run(job)
+
+    def _run(self, job: Tuple) -> float:
+        entry = self._report[job[:2]]
+        try:
+            ttl = self.warm(job)
+            entry["warmed"] += 1
+            entry["last_warmed"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        except Exception as e:
+            # Retry on the regular cadence rather than hammering a failing endpoint
+            ttl = DEFAULT_TTL
+            entry["failed"] += 1
+            entry["last_error"] = str(e)
+        return ttl
+
+    def run(self):
+        """Runs the schedule until stop() is called."""
+        self._plan()
+        maintained = time.monotonic()
+        while not self._stop.is_set() and self._queue:
+            due, _, job = self._queue[0]
+            if self._stop.wait(max(0.0, due - time.monotonic())):
+                break
+            heapq.heappop(self._queue)
+            if not self.limiter.wait(self._stop):
+                break
+            ttl = self._run(job)
+            self._schedule(job, ttl * REFRESH_AT + random.uniform(-self.jitter, self.jitter) * ttl)
+            if time.monotonic() - maintained > MAINTENANCE_EVERY:
+                self.maintain()
+                maintained = time.monotonic()
+
+    def maintain(self):
+        """Drops expired entries from the HTTP cache and the series store."""
+        try:
+            get_registry().compact()
+            get_series_store().vacuum()
+        except Exception as e:
+            print(f"Exception: {e}")
+
+    def start(self) -> threading.Thread:
+        """Runs the schedule on a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="prewarm", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def report(self) -> List[dict]:
+        """Per location and tool: times warmed and failed, last success and last error."""
+        return [dict(entry) for entry in self._report.values()]
+
+
+if __name__ == "__main__":
+    # python prewarm.py Karachi Berlin "New York"
+    prewarmer = Prewarmer(sys.argv[1:] or ["Karachi"])
+    prewarmer.start()
+    try:
+        while True:
+            time.sleep(MAINTENANCE_EVERY)
+            for line in prewarmer.report():
+                print(line)
+    except KeyboardInterrupt:
+        prewarmer.stop()
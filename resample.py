@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+# Resampling of decoded hourly series into daily or N-hour summaries. Rows are
+# binned on the location's wall clock (the response's UTC offset), so a "day"
+# is the local day, and each statistic is one ufunc.reduceat pass over the
+# contiguous bins: no extra request and no DataFrame groupby.
+
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from timeseries import SeriesView, TimeSeries, to_local_seconds
+
+DAY = 86400
+# Statistics computed when none are asked for
+DEFAULT_STATS = ("min", "max", "mean")
+
+
+def _bin_starts(times: np.ndarray, every: int) -> np.ndarray:
+    # Rows are sorted and evenly spaced, so each bin is a contiguous run
+    bins = times // every
+    return np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))
+
+
+def _padded(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # Bins side by side as rows of a NaN-padded matrix, for the order statistics reduceat cannot do
+    lengths = np.diff(np.append(starts, len(values)))
+    matrix = np.full((len(starts), lengths.max()), np.nan)
+    rows = np.repeat(np.arange(len(starts)), lengths)
+    matrix[rows, np.arange(len(values)) - starts[rows]] = values
+    return matrix
+
+
+def reduce_bins(values: np.ndarray, starts: np.ndarray, stats: Iterable[str] = DEFAULT_STATS,
+                percentiles: Sequence[float] = ()) -> Dict[str, np.ndarray]:
+    """
+    NaN-aware statistics of each contiguous bin of values.
+
+    Args:
+        values (numpy.ndarray): Values in time order.
+        starts (numpy.ndarray): Index of the first row of each bin.
+        stats (iterable, optional): Any of "min", "max", "mean", "sum", "count". Defaults to DEFAULT_STATS.
+        percentiles (sequence, optional): Percentiles (0-100) to add as "p<q>". Defaults to ().
+
+    Returns:
+        dict: One array per statistic, one value per bin; NaN for bins without valid values.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    empty = counts == 0
+    result = {}
+    for stat in stats:
+        if stat == "count":
+            result[stat] = counts
+        elif stat == "min":
+            result[stat] = np.where(empty, np.nan, np.minimum.reduceat(np.where(valid, values, np.inf), starts))
+        elif stat == "max":
+            result[stat] = np.where(empty, np.nan, np.maximum.reduceat(np.where(valid, values, -np.inf), starts))
+        elif stat in ("sum", "mean"):
+            sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result[stat] = sums if stat == "sum" else np.where(empty, np.nan, sums / counts)
+        else:
+            raise ValueError(f"Unknown statistic {stat!r}")
+    if percentiles:
+        with warnings.catch_warnings():
+            # All-NaN bins come out as NaN, which is what we want
+            warnings.simplefilter("ignore", RuntimeWarning)
+            table = np.nanpercentile(_padded(values, starts), percentiles, axis=1)
+        for q, row in zip(percentiles, table):
+            result[f"p{q:g}"] = row
+    return result
+
+
+class Resampled:
+    """
+    Per-bin statistics of a series.
+
+    Times are the local wall-clock seconds of each bin's start, like SeriesView.times().
+    """
+
+    def __init__(self, times: np.ndarray, every: int, stats: Dict[str, Dict[str, np.ndarray]], utc_offset: int = 0):
+        self.times = times
+        self.every = every
+        self.stats = stats
+        self.utc_offset = utc_offset
+
+    def __len__(self):
+        return len(self.times)
+
+    def index_of(self, when) -> Optional[int]:
+        """Bin holding `when` (local time at the location), or None."""
+        seconds = to_local_seconds(when, self.utc_offset)
+        index = int(np.searchsorted(self.times, seconds, side="right")) - 1
+        if index < 0 or seconds >= (self.times[index] // self.every + 1) * self.every:
+            return None
+        return index
+
+    def at(self, when) -> Optional[Dict[str, Dict[str, float]]]:
+        """{variable: {statistic: value}} for the bin holding `when`, or None."""
+        index = self.index_of(when)
+        if index is None:
+            return None
+        return {name: {stat: float(values[index]) for stat, values in stats.items()}
+                for name, stats in self.stats.items()}
+
+    def labels(self) -> list:
+        """Local start of each bin as "%Y-%m-%d" for daily bins, else "%Y-%m-%d %H:%M"."""
+        pattern = "%Y-%m-%d" if self.every % DAY == 0 else "%Y-%m-%d %H:%M"
+        return [datetime.fromtimestamp(int(t), timezone.utc).strftime(pattern) for t in self.times]
+
+
+def resample(series: Union[TimeSeries, SeriesView], every: int = DAY, names: Optional[Iterable[str]] = None,
+             stats: Iterable[str] = DEFAULT_STATS, percentiles: Sequence[float] = (),
+             start=None, end=None) -> Resampled:
+    """
+    Summarizes an hourly (or sub-daily) series into bins of `every` seconds.
+
+    Bins are aligned to local midnight (every must divide a day or be whole
+    days); days are the location's, from the series' UTC offset.
+
+    Args:
+        series (TimeSeries or SeriesView): Decoded series.
+        every (int, optional): Bin width in seconds, e.g. 3 * 3600. Defaults to DAY.
+        names (iterable, optional): Variables to summarize. Defaults to all.
+        stats (iterable, optional): Statistics per bin, see reduce_bins. Defaults to DEFAULT_STATS.
+        percentiles (sequence, optional): Percentiles per bin. Defaults to ().
+        start (optional): First local date/time to include. Defaults to the start of the series.
+        end (optional): Local date/time to stop before. Defaults to the end of the series.
+    """
+    if DAY % every and every % DAY:
+        raise ValueError(f"Bins of {every} s do not align with local days")
+    view = series if isinstance(series, SeriesView) else series.view()
+    view = view.between(start, end)
+    if not len(view):
+        return Resampled(np.empty(0, dtype=np.int64), every, {}, view.series.utc_offset)
+    times = view.times()
+    starts = _bin_starts(times, every)
+    summary = {name: reduce_bins(view[name], starts, stats, percentiles) for name in (names or view.names)}
+    return Resampled(times[starts] // every * every, every, summary, view.series.utc_offset)
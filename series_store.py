@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+# Bounded on-disk tier for decoded time series. Each entry is the compressed
+# variable arrays of one TimeSeries rather than the raw HTTP body, and the file
+# is kept under a byte budget: the least valuable entries (least recently used,
+# weighted by how long they took to fetch) are evicted and the freed pages are
+# returned to the filesystem with an incremental vacuum.
+
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import timeseries
+from timeseries import TimeSeries
+
+# Seconds of recency one second of upstream fetch time is worth when choosing what to evict
+COST_WEIGHT = 60.0
+
+
+def _digest(key) -> str:
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+def encode(series: TimeSeries) -> bytes:
+    meta = {"start": series.start, "end": series.end, "interval": series.interval,
+            "utc_offset": series.utc_offset, "cell": series.cell, "names": list(series.variables)}
+    buffer = io.BytesIO()
+    arrays = {f"v{i}": values for i, values in enumerate(series.variables.values())}
+    np.savez_compressed(buffer, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8), **arrays)
+    return buffer.getvalue()
+
+
+def decode(blob: bytes) -> TimeSeries:
+    with np.load(io.BytesIO(blob)) as arrays:
+        meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+        variables = {name: arrays[f"v{i}"] for i, name in enumerate(meta["names"])}
+    cell = tuple(meta["cell"]) if meta["cell"] is not None else None
+    return TimeSeries(meta["start"], meta["end"], meta["interval"], meta["utc_offset"], variables, cell)
+
+
+class SeriesStore:
+    """
+    SQLite store of compressed decoded series with a byte budget.
+
+    Args:
+        path (str, optional): Database file. Defaults to ".series_store.sqlite".
+        max_bytes (int, optional): Budget for stored entries, in bytes. Defaults to 64 MB.
+        cost_weight (float, optional): Recency seconds per second of fetch time. Defaults to COST_WEIGHT.
+    """
+
+    def __init__(self, path: str = ".series_store.sqlite", max_bytes: int = 64 * 1024 * 1024,
+                 cost_weight: float = COST_WEIGHT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.cost_weight = cost_weight
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.evicted = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            # Must be set before the first table is created to take effect
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.execute("CREATE TABLE IF NOT EXISTS series (key TEXT PRIMARY KEY, expires REAL, "
+                       "priority REAL, cost REAL, size INTEGER, blob BLOB)")
+            db.execute("CREATE INDEX IF NOT EXISTS series_priority ON series (priority)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get(self, key, not_before: float = 0.0) -> Optional[Tuple[TimeSeries, float]]:
+        """The stored series and its expiry (unix seconds), or None if absent or expired before not_before."""
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT expires, cost, blob FROM series WHERE key = ? AND expires >= ?",
+                             (_digest(key), not_before)).fetchone()
+            if row is None:
+                return None
+            expires, cost, blob = row
+            db.execute("UPDATE series SET priority = ? WHERE key = ?",
+                       (time.time() + cost * self.cost_weight, _digest(key)))
+            db.commit()
+        return decode(blob), expires
+
+    def put(self, key, series: TimeSeries, expires: float, cost: float = 0.0):
+        """
+        Stores a series until `expires` (unix seconds).
+
+        Args:
+            key: Cache key, as built by timeseries.series_key.
+            series (TimeSeries): Decoded series.
+            expires (float): Expiry in unix seconds.
+            cost (float, optional): Seconds the upstream fetch took. Defaults to 0.
+        """
+        blob = encode(series)
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            db = self._connect()
+            db.execute("INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+                       (_digest(key), expires, time.time() + cost * self.cost_weight, cost, len(blob), blob))
+            db.commit()
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM series").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM series ORDER BY priority"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        db.executemany("DELETE FROM series WHERE key = ?", victims)
+        db.commit()
+        self.evicted += len(victims)
+        db.execute("PRAGMA incremental_vacuum")
+
+    def vacuum(self):
+        """Drops expired entries and returns the free pages to the filesystem."""
+        with self._lock:
+            db = self._connect()
+            db.execute("DELETE FROM series WHERE expires < ?", (time.time(),))
+            db.commit()
+            db.execute("PRAGMA incremental_vacuum")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            db = self._connect()
+            entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM series").fetchone()
+            pages, free = (db.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in ("page_count", "freelist_count"))
+            page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        return {"entries": entries, "bytes": size, "file_bytes": pages * page_size,
+                "free_bytes": free * page_size, "evicted": self.evicted}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_store: Optional[SeriesStore] = None
+_store_lock = threading.Lock()
+
+
+def get_series_store(**kwargs) -> SeriesStore:
+    # kwargs apply on first use only
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SeriesStore(**kwargs)
+    return _store
+
+
+def enable_series_store(**kwargs) -> SeriesStore:
+    """Puts the on-disk tier behind the shared series cache and returns it."""
+    store = get_series_store(**kwargs)
+    timeseries.set_series_store(store)
+    return store
+
+
+def disable_series_store():
+    timeseries.set_series_store(None)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+
+# Decoded Open-Meteo time series kept in memory between tool calls. A cached
+# series answers any date or datetime inside its window by offset arithmetic
+# on Time()/Interval(), without another request or a DataFrame.
+
+import calendar
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+import grid
+from cache_policy import STALE_WHILE_REVALIDATE, refresher, ttl_for
+
+# Params that only move the window; a cached series for the same place and variables still applies
+WINDOW_PARAMS = ("past_days", "forecast_days", "past_hours", "forecast_hours",
+                 "start_date", "end_date", "start_hour", "end_hour")
+
+
+def parse_when(when) -> datetime:
+    """Parses a tool argument date/datetime; pandas is only used for unusual formats."""
+    if isinstance(when, datetime):
+        return when
+    if isinstance(when, date):
+        return datetime(when.year, when.month, when.day)
+    try:
+        return datetime.fromisoformat(str(when).strip())
+    except ValueError:
+        import pandas as pd
+        return pd.to_datetime(when).to_pydatetime()
+
+
+def to_local_seconds(when, utc_offset: int = 0) -> int:
+    """
+    Seconds since the epoch of the wall-clock time `when` at the location.
+
+    Naive values (str, date, datetime, pandas Timestamp) are read as local
+    time; aware datetimes are shifted by the location's UTC offset.
+    """
+    if isinstance(when, (int, float, np.integer, np.floating)):
+        return int(when) + utc_offset
+    if isinstance(when, str):
+        when = parse_when(when)
+    if isinstance(when, datetime):
+        if when.tzinfo is not None:
+            return int(when.timestamp()) + utc_offset
+        return calendar.timegm(when.timetuple())
+    if isinstance(when, date):
+        return calendar.timegm(when.timetuple())
+    raise TypeError(f"Unsupported date value: {when!r}")
+
+
+def _values(variable) -> np.ndarray:
+    # sunrise/sunset and other timestamps are stored as int64 values
+    values = variable.ValuesAsNumpy()
+    if not isinstance(values, np.ndarray):
+        values = variable.ValuesInt64AsNumpy()
+    return values
+
+
+class TimeSeries:
+    """
+    One decoded daily or hourly block: variable arrays plus their time axis.
+
+    Times follow the response: start/end are unix seconds (UTC) and
+    utc_offset shifts them to the location's wall clock.
+    """
+
+    def __init__(self, start: int, end: int, interval: int, utc_offset: int,
+                 variables: Dict[str, np.ndarray], cell: Tuple[float, float] = None):
+        self.start = int(start)
+        self.end = int(end)
+        self.interval = int(interval)
+        self.utc_offset = int(utc_offset)
+        self.variables = variables
+        self.cell = cell
+
+    @classmethod
+    def from_response(cls, response, block: str, names: Sequence[str]) -> "TimeSeries":
+        # The order of variables is the same as requested
+        data = getattr(response, block.capitalize())()
+        variables = {name: _values(data.Variables(i)) for i, name in enumerate(names)}
+        return cls(data.Time(), data.TimeEnd(), data.Interval(), response.UtcOffsetSeconds(), variables,
+                   (round(float(response.Latitude()), 4), round(float(response.Longitude()), 4)))
+
+    def __len__(self):
+        return (self.end - self.start) // self.interval if self.interval else 0
+
+    def index_of(self, when) -> Optional[int]:
+        """Row holding `when` (local time at the location), or None outside the window."""
+        offset = to_local_seconds(when, self.utc_offset) - (self.start + self.utc_offset)
+        index = offset // self.interval if self.interval else -1
+        return int(index) if 0 <= index < len(self) else None
+
+    def covers(self, when) -> bool:
+        return self.index_of(when) is not None
+
+    def time_at(self, index: int) -> datetime:
+        """Local wall-clock time of a row, as a naive datetime."""
+        return datetime.fromtimestamp(self.start + self.utc_offset + index * self.interval, timezone.utc).replace(tzinfo=None)
+
+    def value(self, name: str, when) -> Optional[float]:
+        index = self.index_of(when)
+        return None if index is None else float(self.variables[name][index])
+
+    def row(self, when) -> Optional[Dict[str, float]]:
+        index = self.index_of(when)
+        if index is None:
+            return None
+        return {name: float(values[index]) for name, values in self.variables.items()}
+
+    def view(self) -> "SeriesView":
+        return SeriesView(self)
+
+    def between(self, start, end) -> "SeriesView":
+        """Rows from `start` up to but excluding `end`, clipped to the window."""
+        return self.view().between(start, end)
+
+
+class SeriesView:
+    """
+    Zero-copy window over a TimeSeries.
+
+    Variables are NumPy slices of the decoded arrays, so selecting a window
+    allocates nothing; pandas is only involved when to_pandas() is called.
+    """
+
+    def __init__(self, series: TimeSeries, lo: int = 0, hi: Optional[int] = None):
+        self.series = series
+        self.lo = lo
+        self.hi = len(series) if hi is None else hi
+
+    def __len__(self):
+        return max(0, self.hi - self.lo)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.series.variables[name][self.lo:self.hi]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.series.variables
+
+    @property
+    def names(self):
+        return list(self.series.variables)
+
+    @property
+    def start(self) -> int:
+        """Local wall-clock seconds of the first row."""
+        s = self.series
+        return s.start + s.utc_offset + self.lo * s.interval
+
+    def times(self) -> np.ndarray:
+        """Local wall-clock seconds of every row."""
+        return self.start + np.arange(len(self), dtype=np.int64) * self.series.interval
+
+    def _clip(self, when, default):
+        if when is None:
+            return default
+        s = self.series
+        offset = to_local_seconds(when, s.utc_offset) - (s.start + s.utc_offset)
+        index = -(-offset // s.interval)  # first row at or after `when`
+        return min(max(int(index), self.lo), self.hi)
+
+    def between(self, start=None, end=None) -> "SeriesView":
+        return SeriesView(self.series, self._clip(start, self.lo), self._clip(end, self.hi))
+
+    def at(self, when) -> Optional[Dict[str, float]]:
+        index = self.series.index_of(when)
+        if index is None or not self.lo <= index < self.hi:
+            return None
+        return {name: float(values[index]) for name, values in self.series.variables.items()}
+
+    def to_pandas(self):
+        """DataFrame with a "date" column, for callers that need pandas."""
+        import pandas as pd
+        data = {"date": pd.to_datetime(self.times(), unit="s")}
+        data.update({name: self[name] for name in self.names})
+        return pd.DataFrame(data)
+
+
+class TimeSeriesCache:
+    """
+    LRU of decoded series keyed by (endpoint, grid cell, block, variables, other params).
+
+    Entries evicted from memory can still be found in the optional on-disk
+    store (see series_store.SeriesStore), which every set() writes through to.
+
+    Args:
+        ttl (int, optional): Seconds a series stays valid unless set() is given a TTL. Defaults to 3600.
+        max_entries (int, optional): Series kept in memory. Defaults to 256.
+        stale_while_revalidate (int, optional): Seconds past expiry lookup() still returns a series. Defaults to STALE_WHILE_REVALIDATE.
+        store (SeriesStore, optional): On-disk tier. Defaults to None.
+    """
+
+    def __init__(self, ttl: int = 3600, max_entries: int = 256,
+                 stale_while_revalidate: int = STALE_WHILE_REVALIDATE, store=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.store = store
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, when=None) -> Tuple[Optional[TimeSeries], bool]:
+        """
+        The cached series for key if it covers `when`, and whether it is stale.
+
+        A series is returned up to stale_while_revalidate seconds past its
+        expiry, flagged stale so the caller can refresh it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.store is not None:
+            stored = self.store.get(key, not_before=time.time() - self.stale_while_revalidate)
+            if stored is not None:
+                series, expires_at = stored
+                entry = (time.monotonic() + (expires_at - time.time()), series)
+                with self._lock:
+                    self._insert(key, entry)
+
+        with self._lock:
+            if entry is not None:
+                expires, series = entry
+                now = time.monotonic()
+                if expires + self.stale_while_revalidate < now:
+                    self._entries.pop(key, None)
+                elif when is None or series.covers(when):
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                    return series, expires < now
+            self.misses += 1
+            return None, False
+
+    def get(self, key, when=None) -> Optional[TimeSeries]:
+        """The cached series for key if it is fresh and, when given, covers `when`."""
+        series, stale = self.lookup(key, when)
+        return None if stale else series
+
+    def _insert(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key, series: TimeSeries, ttl: Optional[int] = None, cost: float = 0.0):
+        """Stores a series for ttl seconds; cost is the fetch time, used by the on-disk tier's eviction."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._insert(key, (time.monotonic() + ttl, series))
+        if self.store is not None:
+            self.store.put(key, series, time.time() + ttl, cost)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+series_cache = TimeSeriesCache()
+
+
+def set_series_store(store):
+    """Attaches (or with None, detaches) the on-disk tier of the shared series cache."""
+    series_cache.store = store
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, (list, tuple)) else value
+
+
+def series_key(url: str, params: dict, block: str):
+    # The snapped point, not the learned cell, so the key is the same before and after learning
+    params = grid.snapped(url, params)
+    rest = tuple(sorted((k, _freeze(v)) for k, v in params.items() if k not in WINDOW_PARAMS))
+    return grid.endpoint_of(url), block, rest
+
+
+def block_names(params: dict, block: str) -> Tuple[str, ...]:
+    names = params[block]
+    return (names,) if isinstance(names, str) else tuple(names)
+
+
+def _fetch(openmeteo, url: str, params: dict, block: str, key, **kwargs) -> TimeSeries:
+    if series_cache.store is not None:
+        # The decoded arrays are persisted compactly, so the raw body need not be
+        kwargs.setdefault("cache_raw", False)
+    started = time.monotonic()
+    responses = openmeteo.weather_api(url, params=params, **kwargs)
+    series = TimeSeries.from_response(responses[0], block, block_names(params, block))
+    series_cache.set(key, series, ttl_for(url, params), cost=time.monotonic() - started)
+    return series
+
+
+def refresh_series(openmeteo, url: str, params: dict, block: str) -> TimeSeries:
+    """Fetches `block` upstream, bypassing every cache, and stores the result."""
+    return _fetch(openmeteo, url, params, block, series_key(url, params, block), force_refresh=True)
+
+
+def fetch_series(openmeteo, url: str, params: dict, block: str, when=None, until=None) -> TimeSeries:
+    """
+    Returns the decoded `block` ("daily" or "hourly") for a request, from memory when possible.
+
+    A cached series is reused when it covers `when` (and `until`, for a
+    range); otherwise the request is made and its decoded arrays replace the
+    cached entry. A just-expired
+    series is still returned, and refreshed on the background worker.
+    """
+    key = series_key(url, params, block)
+    series, stale = series_cache.lookup(key, when)
+    if series is not None and until is not None and not series.covers(until):
+        series = None
+    if series is None:
+        return _fetch(openmeteo, url, params, block, key)
+    if stale:
+        # Bypass the HTTP cache, whose entry expired at the same time
+        refresher.submit(key, lambda: refresh_series(openmeteo, url, params, block))
+    return series
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+
+# Tool registry. Each tool function is registered once with @tool; the JSON
+# schema sent to the model, the argument defaults and coercers, and the
+# dispatch entry are all derived from that registration at import time, so
+# they cannot drift apart and nothing is rebuilt per request.
+
+import inspect
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from timeseries import parse_when
+
+# Arguments the model never supplies; the dispatcher injects them
+INJECTED = ("openmeteo",)
+
+
+# Type of arguments shared by several tools, by parameter name
+ARGUMENT_TYPES: Dict[str, type] = {
+    "latitude": float,
+    "longitude": float,
+    "timestamp": float,
+    "aqi_value": float,
+    "code": int,
+    "count": int,
+    "target_year": int,
+    "baseline_start": int,
+    "baseline_end": int,
+}
+# Arguments parsed as dates; the tools accept the parsed datetime as well as the string
+DATE_ARGUMENTS = ("target_date", "target_datetime", "end_date")
+# Descriptions of arguments shared by several tools, by parameter name
+ARGUMENT_DESCRIPTIONS: Dict[str, str] = {
+    "latitude": "Latitude of the location.",
+    "longitude": "Longitude of the location.",
+    "target_date": "Target date in the format \"%Y-%m-%d\".",
+    "target_datetime": "Target date in the format \"%Y-%m-%d\".",
+}
+# Legacy "format" strings of the schema, per Python type
+_FORMATS = {float: "float", int: "integer", str: "string"}
+_FORMAT_TYPES = {format: kind for kind, format in _FORMATS.items()}
+# JSON types of the compact schema, per Python type
+_JSON_TYPES = {float: "number", int: "integer", str: "string"}
+# Compact schema: arguments whose name says it all, and shorter wording for the rest
+SELF_EXPLANATORY = ("latitude", "longitude", "city_name")
+COMPACT_DESCRIPTIONS: Dict[str, str] = {
+    "target_date": "YYYY-MM-DD",
+    "target_datetime": "YYYY-MM-DD or YYYY-MM-DDTHH:MM",
+    "end_date": "YYYY-MM-DD, last day of a range",
+}
+
+
+class ToolArgumentError(ValueError):
+    """The model supplied a missing or malformed argument."""
+
+
+def _coercer(name: str, kind) -> Optional[Callable]:
+    if name in DATE_ARGUMENTS:
+        return parse_when
+    if kind is int:
+        # Models often send whole numbers as "2030" or 2030.0
+        return lambda value: int(float(value))
+    if kind is float:
+        return float
+    return None
+
+
+class Tool:
+    """
+    A registered tool: the function plus its schema, defaults and argument coercers.
+
+    Args:
+        function (callable): The tool function.
+        name (str): Tool name the model calls.
+        description (str): What the tool does.
+        parameters (dict): Per-argument description string, or a full JSON schema dict.
+        returns (dict, optional): JSON schema of the result. Defaults to None.
+        note (str, optional): Extra usage note for the model. Defaults to None.
+        internal (bool, optional): Dispatchable but left out of the compact payload. Defaults to False.
+        family (str, optional): Tool family the intent classifier selects. Defaults to None, always sent.
+    """
+
+    def __init__(self, function: Callable, name: str, description: str, parameters: Dict[str, Union[str, dict]],
+                 returns: Optional[dict] = None, note: Optional[str] = None, internal: bool = False,
+                 family: Optional[str] = None):
+        self.function = function
+        self.name = name
+        self.description = description
+        self.internal = internal
+        self.family = family
+        signature = inspect.signature(function)
+        self.takes_client = "openmeteo" in signature.parameters
+        arguments = [p for p in signature.parameters.values()
+                     if p.name not in INJECTED and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+        self.defaults = {p.name: p.default for p in arguments if p.default is not inspect.Parameter.empty}
+        self.required = [p.name for p in arguments if p.default is inspect.Parameter.empty]
+        if any(p.kind == p.VAR_KEYWORD for p in signature.parameters.values()):
+            # Documented keyword arguments of a **kwargs function are optional and have no default here
+            named = {p.name for p in arguments}
+            arguments += [inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY)
+                          for name in parameters if name not in named]
+        self.types = {p.name: self._type_of(p, parameters.get(p.name)) for p in arguments}
+        self.coercers = {name: coerce for name, coerce in
+                         ((name, _coercer(name, kind)) for name, kind in self.types.items()) if coerce}
+
+        properties = {}
+        for p in arguments:
+            spec = parameters.get(p.name, ARGUMENT_DESCRIPTIONS.get(p.name))
+            if isinstance(spec, dict):
+                properties[p.name] = spec
+            else:
+                properties[p.name] = {"type": "string", "format": _FORMATS[self.types[p.name]]}
+                if spec:
+                    properties[p.name]["description"] = spec
+        self.schema = {"type": "function", "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": properties, "required": self.required},
+        }}
+        if returns is not None:
+            self.schema["function"]["return"] = returns
+        if note is not None:
+            self.schema["function"]["note"] = {"type": "string", "content": note}
+        self.compact_schema = self._compact(parameters, [p.name for p in arguments])
+
+    def _compact(self, parameters: dict, names: List[str]) -> dict:
+        # No return or note blocks, real JSON types, and descriptions only where the name is not enough
+        properties = {}
+        for name in names:
+            spec = parameters.get(name)
+            schema = {"type": _JSON_TYPES[self.types[name]]}
+            if isinstance(spec, dict):
+                spec = spec.get("description")
+            description = COMPACT_DESCRIPTIONS.get(name) or (spec if name not in SELF_EXPLANATORY else None)
+            if description:
+                schema["description"] = description.split(" Defaults to")[0]
+            properties[name] = schema
+        return {"type": "function", "function": {
+            "name": self.name,
+            "description": self.description.split(". ")[0].rstrip("."),
+            "parameters": {"type": "object", "properties": properties, "required": self.required},
+        }}
+
+    @staticmethod
+    def _type_of(parameter: inspect.Parameter, spec) -> type:
+        if parameter.name in ARGUMENT_TYPES:
+            return ARGUMENT_TYPES[parameter.name]
+        if parameter.annotation in _FORMATS:
+            return parameter.annotation
+        if isinstance(spec, dict):
+            return _FORMAT_TYPES.get(spec.get("format"), str)
+        return str
+
+    def arguments(self, supplied: Optional[dict]) -> dict:
+        """
+        Defaults merged with the supplied arguments, coerced to the types the function expects.
+
+        Unknown arguments are dropped. Raises ToolArgumentError for a missing or malformed argument.
+        """
+        arguments = dict(self.defaults)
+        for name, value in (supplied or {}).items():
+            if name in self.types:
+                arguments[name] = value
+        missing = [name for name in self.required if arguments.get(name) is None]
+        if missing:
+            raise ToolArgumentError(f"{self.name}: missing argument(s) {', '.join(missing)}")
+        for name, coerce in self.coercers.items():
+            value = arguments.get(name)
+            if value is None or value == "":
+                continue
+            try:
+                arguments[name] = coerce(value)
+            except (TypeError, ValueError) as e:
+                raise ToolArgumentError(f"{self.name}: invalid {name} {value!r}: {e}") from e
+        return arguments
+
+    def __call__(self, supplied: Optional[dict] = None, openmeteo=None):
+        arguments = self.arguments(supplied)
+        if self.takes_client:
+            if openmeteo is None:
+                from functions import get_openmeteo_client
+                openmeteo = get_openmeteo_client()
+            arguments["openmeteo"] = openmeteo
+        return self.function(**arguments)
+
+
+class ToolRegistry:
+    """Registered tools by name, in registration order, with the serialized payload cached."""
+
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+        self._payloads: Dict[Tuple, List[dict]] = {}
+        self._payload_json: Dict[bool, str] = {}
+
+    def tool(self, description: str, name: Optional[str] = None, returns: Optional[dict] = None,
+             note: Optional[str] = None, internal: bool = False, family: Optional[str] = None, **parameters):
+        """
+        Decorator registering a function as a tool. The function is returned unchanged.
+
+        Args:
+            description (str): What the tool does.
+            name (str, optional): Tool name, if not the function name. Defaults to None.
+            returns (dict, optional): JSON schema of the result. Defaults to None.
+            note (str, optional): Extra usage note for the model. Defaults to None.
+            internal (bool, optional): Leave the tool out of the compact payload. Defaults to False.
+            family (str, optional): Tool family for per-query subsetting. Defaults to None, always sent.
+            **parameters: Description (or full schema) per argument; shared arguments are described already.
+        """
+        def register(function):
+            entry = Tool(function, name or function.__name__, description, parameters, returns, note, internal, family)
+            self._tools[entry.name] = entry
+            self._payloads.clear()
+            self._payload_json.clear()
+            return function
+        return register
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[Tool]:
+        return iter(self._tools.values())
+
+    def __len__(self):
+        return len(self._tools)
+
+    def families(self) -> List[str]:
+        """Tool families in registration order."""
+        return list(dict.fromkeys(entry.family for entry in self._tools.values() if entry.family))
+
+    def tools(self, compact: bool = False, families: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        The `tools` list for chat.completions.create, built once per mode and subset.
+
+        Args:
+            compact (bool, optional): Minimal schemas without internal tools. Defaults to False.
+            families (iterable, optional): Only tools of these families, plus the family-less ones.
+                Defaults to None, every tool.
+        """
+        key = (compact, None if families is None else frozenset(families))
+        if key not in self._payloads:
+            self._payloads[key] = [entry.compact_schema if compact else entry.schema
+                                   for entry in self._tools.values()
+                                   if not (compact and entry.internal)
+                                   and (key[1] is None or entry.family is None or entry.family in key[1])]
+        return self._payloads[key]
+
+    def tools_json(self, compact: bool = False) -> str:
+        """tools() serialized once, for logging, hashing or raw HTTP clients."""
+        if compact not in self._payload_json:
+            self._payload_json[compact] = json.dumps(self.tools(compact), ensure_ascii=False)
+        return self._payload_json[compact]
+
+    def token_report(self, model: str = "gpt-3.5-turbo") -> List[dict]:
+        """
+        Tokens each tool's full and compact schema adds to every prompt, plus a total row.
+
+        Counts the serialized JSON with tiktoken when it is installed, else
+        estimates four characters per token; the API's own framing adds a
+        few tokens per tool on top.
+        """
+        count = token_counter(model)
+        rows = []
+        for entry in self._tools.values():
+            full = count(json.dumps(entry.schema, ensure_ascii=False))
+            compact = 0 if entry.internal else count(json.dumps(entry.compact_schema, ensure_ascii=False))
+            rows.append({"tool": entry.name, "full": full, "compact": compact})
+        rows.append({"tool": "total", "full": sum(row["full"] for row in rows),
+                     "compact": sum(row["compact"] for row in rows)})
+        return rows
+
+    def call(self, name: str, supplied: Optional[dict] = None, openmeteo=None):
+        entry = self._tools.get(name)
+        if entry is None:
+            raise ToolArgumentError(f"unknown function {name}")
+        return entry(supplied, openmeteo)
+
+
+def token_counter(model: str = "gpt-3.5-turbo") -> Callable[[str], int]:
+    try:
+        import tiktoken
+    except ImportError:
+        return lambda text: (len(text) + 3) // 4
+    encoding = tiktoken.encoding_for_model(model)
+    return lambda text: len(encoding.encode(text))
+
+
+registry = ToolRegistry()
+tool = registry.tool
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+# Per-turn fetch planner. When one model turn calls several tools that hit the
+# same endpoint at the same place (describe_current_weather and
+# get_today_weather_data, air_quality_data and describe_current_air_quality_index,
+# daily_marine_data and hourly_marine_data), their variables are merged into a
+# single request and each tool reads its own variables back from the shared response.
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import grid
+from singleflight import freeze
+
+# Params holding requested variables, merged by union
+BLOCKS = ("current", "hourly", "daily")
+# Window params merged by taking the earliest start and the latest end
+WINDOW = ("start_date", "end_date")
+
+
+def _names(value) -> List[str]:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def group_key(url: str, params: dict) -> Tuple:
+    """Requests with the same key can be answered by one merged request, timezone permitting."""
+    _, points = grid.canonicalize(url, params)
+    ignored = BLOCKS + WINDOW + ("latitude", "longitude", "timezone")
+    rest = freeze({k: v for k, v in params.items() if k not in ignored})
+    return grid.endpoint_of(url), tuple(points), rest
+
+
+def _current_only(params: dict) -> bool:
+    # Current values do not depend on the timezone (the offset is read from the response)
+    return all(block == "current" for block in BLOCKS if block in params)
+
+
+class _SlicedBlock:
+    """A block of the merged response exposing one tool's variables in its own order."""
+
+    def __init__(self, block, indices: List[int]):
+        self._block = block
+        self._indices = indices
+
+    def Variables(self, i):
+        return self._block.Variables(self._indices[i])
+
+    def VariablesLength(self):
+        return len(self._indices)
+
+    def __getattr__(self, name):
+        return getattr(self._block, name)
+
+
+class _SlicedResponse:
+    def __init__(self, response, indices: Dict[str, List[int]]):
+        self._response = response
+        self._indices = indices
+
+    def _block(self, block: str):
+        if block not in self._indices:
+            return None
+        data = getattr(self._response, block.capitalize())()
+        return None if data is None else _SlicedBlock(data, self._indices[block])
+
+    def Current(self):
+        return self._block("current")
+
+    def Hourly(self):
+        return self._block("hourly")
+
+    def Daily(self):
+        return self._block("daily")
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class _Group:
+    def __init__(self, url: str, params: dict):
+        self.url = url
+        self.params = dict(params)
+        self.members = 0
+        # Whether a daily/hourly member fixed the timezone of the merged request
+        self.timezone_bound = False
+        self._responses = None
+        self._lock = threading.Lock()
+
+    def accepts(self, params: dict) -> bool:
+        return (_current_only(params) or not self.timezone_bound
+                or self.params.get("timezone") == params.get("timezone"))
+
+    def add(self, params: dict):
+        self.members += 1
+        if not _current_only(params) and not self.timezone_bound:
+            self.timezone_bound = True
+            self.params.pop("timezone", None)
+            if "timezone" in params:
+                self.params["timezone"] = params["timezone"]
+        if self.members == 1:
+            return
+        for block in BLOCKS:
+            names = _names(self.params.get(block))
+            names += [name for name in _names(params.get(block)) if name not in names]
+            if names:
+                self.params[block] = names
+        if "start_date" in params:
+            self.params["start_date"] = min(self.params.get("start_date", params["start_date"]), params["start_date"])
+            self.params["end_date"] = max(self.params.get("end_date", params["end_date"]), params["end_date"])
+
+    def covers(self, params: dict) -> bool:
+        for block in BLOCKS:
+            if not set(_names(params.get(block))) <= set(_names(self.params.get(block))):
+                return False
+        if "start_date" in params:
+            return ("start_date" in self.params and self.params["start_date"] <= params["start_date"]
+                    and params["end_date"] <= self.params["end_date"])
+        return True
+
+    def responses(self, openmeteo, **kwargs) -> list:
+        with self._lock:
+            if self._responses is None:
+                self._responses = openmeteo.weather_api(self.url, params=self.params, **kwargs)
+            return self._responses
+
+    def slice(self, responses, params: dict) -> list:
+        indices = {}
+        for block in BLOCKS:
+            if block in params:
+                merged = _names(self.params[block])
+                indices[block] = [merged.index(name) for name in _names(params[block])]
+        return [_SlicedResponse(response, indices) for response in responses]
+
+
+class TurnPlanner:
+    """
+    Open-Meteo client for the tool calls of one turn.
+
+    Register every request the turn will make with add(), then pass the
+    planner to the tools in place of the shared client. Requests that share a
+    group with another tool call are served from one merged request, made by
+    whichever tool asks first; everything else goes straight to the client.
+
+    Args:
+        openmeteo: The shared Open-Meteo client.
+    """
+
+    def __init__(self, openmeteo):
+        self.openmeteo = openmeteo
+        self._groups: Dict[Tuple, List[_Group]] = {}
+        # Upstream requests this turn avoids by merging
+        self.merged = 0
+
+    def add(self, url: str, params: dict):
+        groups = self._groups.setdefault(group_key(url, params), [])
+        group = next((group for group in groups if group.accepts(params)), None)
+        if group is None:
+            group = _Group(url, params)
+            groups.append(group)
+        else:
+            self.merged += 1
+        group.add(params)
+
+    def _group_for(self, url: str, params: dict) -> Optional[_Group]:
+        for group in self._groups.get(group_key(url, params), ()):
+            if group.members > 1 and group.accepts(params) and group.covers(params):
+                return group
+        return None
+
+    def weather_api(self, url: str, params: dict, **kwargs):
+        # Forced refreshes always go upstream; other options apply to the merged request
+        group = None if kwargs.get("force_refresh") else self._group_for(url, params)
+        if group is None:
+            return self.openmeteo.weather_api(url, params=params, **kwargs)
+        return group.slice(group.responses(self.openmeteo, **kwargs), params)